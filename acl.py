@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import sqlite3
+from config import config
+
+log = logging.getLogger(__name__)
+
+# Roles a user can hold. Owners come from config and are never persisted.
+ROLES = ("owner", "admin", "whitelist", "blacklist")
+GRANTABLE_ROLES = ("admin", "whitelist", "blacklist")
+
+class AccessControl:
+    """Role membership for access checks, persisted in SQLite.
+
+    Each role is an in-memory set of integer user IDs, so every check is a single
+    hash lookup no matter how long the lists grow. Grants and revocations are
+    written through to the database, and a background task reloads the sets when
+    another process changes it, so lists can be edited without a restart.
+    """
+
+    def __init__(self, path=None, reload_interval=None):
+        self.reload_interval = reload_interval or config["aclReloadInterval"]
+
+        self.conn = sqlite3.connect(path or config["aclPath"])
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS acl (
+                userId INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                PRIMARY KEY (userId, role)
+            )
+        """)
+
+        # Seed the database from the lists in config on first run
+        if self.conn.execute("SELECT COUNT(*) FROM acl").fetchone()[0] == 0:
+            seed = [(parse_user_id(user_id), "whitelist") for user_id in config["whitelistedUsers"]]
+            seed += [(parse_user_id(user_id), "blacklist") for user_id in config["blacklistedUsers"]]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO acl (userId, role) VALUES (?, ?)",
+                [(user_id, role) for user_id, role in seed if user_id is not None]
+            )
+        self.conn.commit()
+
+        self.owners = set()
+        owner_id = parse_user_id(config["ownerId"])
+        if owner_id is not None:
+            self.owners.add(owner_id)
+
+        # role -> set of user IDs, replaced as a whole on reload
+        self.members = {}
+        self.data_version = None
+        self.task = None
+        self.reload()
+
+    def reload(self):
+        """Reload every role from the database"""
+        members = {role: set() for role in ROLES}
+        for user_id, role in self.conn.execute("SELECT userId, role FROM acl"):
+            if role in members and role != "owner":
+                members[role].add(user_id)
+        members["owner"] = self.owners
+        self.members = members
+        self.data_version = self._data_version()
+
+    def start(self):
+        """Start watching the database for changes made elsewhere"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop watching the database and close it"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        self.conn.close()
+
+    def has_role(self, user_id, role):
+        """Check if a user holds a role"""
+        return user_id in self.members[role]
+
+    def grant(self, user_id, role):
+        """Give a user a role. Returns False if they already had it."""
+        self._check_grantable(role)
+        members = self.members[role]
+        if user_id in members:
+            return False
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO acl (userId, role) VALUES (?, ?)", (user_id, role))
+        members.add(user_id)
+        return True
+
+    def revoke(self, user_id, role):
+        """Take a role from a user. Returns False if they did not have it."""
+        self._check_grantable(role)
+        members = self.members[role]
+        if user_id not in members:
+            return False
+        with self.conn:
+            self.conn.execute("DELETE FROM acl WHERE userId = ? AND role = ?", (user_id, role))
+        members.discard(user_id)
+        return True
+
+    def get_members(self, role):
+        """Get the user IDs holding a role"""
+        return frozenset(self.members[role])
+
+    async def _run(self):
+        """Reload the roles whenever the database changes"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if self._data_version() != self.data_version:
+                    self.reload()
+                    log.info("Access control lists reloaded")
+            except Exception as e:
+                log.error("Access control reload error: %s", e)
+
+    def _check_grantable(self, role):
+        """Reject roles that cannot be granted at runtime"""
+        if role not in GRANTABLE_ROLES:
+            raise ValueError(f"Role cannot be granted: {role}")
+
+    def _data_version(self):
+        """Get SQLite's counter of commits made by other connections"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+def parse_user_id(user_id):
+    """Convert a Discord user ID to an int (None if it is not a valid ID)"""
+    if isinstance(user_id, int):
+        return user_id
+    try:
+        return int(str(user_id).strip())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from config import config
+
+log = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Token bucket rate limiter per key, implemented as GCRA.
+
+    Each key is a single float: its theoretical arrival time (TAT), the moment
+    its bucket will be full again. A request is allowed if TAT - now leaves room
+    for one more emission interval within the burst. Keys whose TAT has passed
+    have a full bucket, which is the same as not being tracked, so `sweep()`
+    drops them and memory only grows with users that are currently throttled.
+    """
+
+    def __init__(self, rate, burst):
+        # rate <= 0 disables the limiter
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.tolerance = self.interval * max(burst - 1, 0)
+
+        # key -> theoretical arrival time (time.monotonic())
+        self.tat = {}
+
+    def check(self, key, now):
+        """Return (new TAT, 0) if a request is allowed, or (None, seconds to wait) if not"""
+        if not self.interval:
+            return None, 0.0
+        tat = max(self.tat.get(key, now), now)
+        wait = tat - self.tolerance - now
+        if wait > 0:
+            return None, wait
+        return tat + self.interval, 0.0
+
+    def commit(self, key, tat):
+        """Record a request allowed by `check()`"""
+        if tat is not None:
+            self.tat[key] = tat
+
+    def sweep(self, now):
+        """Forget every key whose bucket has refilled"""
+        expired = [key for key, tat in self.tat.items() if tat <= now]
+        for key in expired:
+            del self.tat[key]
+        return len(expired)
+
+class LoopLagMonitor:
+    """Smoothed event loop lag, measured by how late a periodic sleep wakes up"""
+
+    def __init__(self, interval, smoothing=0.3):
+        self.interval = interval
+        self.smoothing = smoothing
+        self.lag = 0.0
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self.lag += self.smoothing * (lag - self.lag)
+
+class AdmissionControl:
+    """Decides whether a new swap may start.
+
+    New swaps are shed while the event loop lags, then checked against
+    per-user, per-guild and global token buckets. A request only takes a token
+    when every bucket has one, so a rejected swap never uses up a user's quota.
+    """
+
+    def __init__(self):
+        self.limiters = {
+            "user": RateLimiter(config["swapUserRate"], config["swapUserBurst"]),
+            "guild": RateLimiter(config["swapGuildRate"], config["swapGuildBurst"]),
+            "global": RateLimiter(config["swapGlobalRate"], config["swapGlobalBurst"])
+        }
+        self.lag_monitor = LoopLagMonitor(config["loadShedInterval"])
+        self.max_lag = config["loadShedLag"]
+        self.sweep_interval = config["rateLimitSweepInterval"]
+        self.task = None
+
+    def start(self):
+        """Start measuring loop lag and pruning refilled buckets"""
+        self.lag_monitor.start()
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background tasks"""
+        await self.lag_monitor.stop()
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def is_overloaded(self):
+        """Check if the event loop is too saturated to take new swaps"""
+        return self.max_lag > 0 and self.lag_monitor.lag > self.max_lag
+
+    def admit(self, user_id, guild_id=None):
+        """Take a token for a new swap. Call this only once the swap is otherwise valid.
+
+        Returns (None, 0) if the swap may start, or (scope, seconds to wait)
+        naming the first limit that was hit ("user", "guild" or "global").
+        """
+        now = time.monotonic()
+        keys = {"user": user_id, "guild": guild_id, "global": None}
+        allowed = []
+        for scope, limiter in self.limiters.items():
+            if scope == "guild" and guild_id is None:
+                continue
+            tat, wait = limiter.check(keys[scope], now)
+            if wait > 0:
+                return scope, wait
+            allowed.append((limiter, keys[scope], tat))
+
+        for limiter, key, tat in allowed:
+            limiter.commit(key, tat)
+        return None, 0.0
+
+    def get_stats(self):
+        """Get the loop lag and the number of keys each limiter is tracking"""
+        stats = {scope: len(limiter.tat) for scope, limiter in self.limiters.items()}
+        stats["loopLag"] = self.lag_monitor.lag
+        return stats
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            now = time.monotonic()
+            for scope, limiter in self.limiters.items():
+                removed = limiter.sweep(now)
+                if removed:
+                    log.debug("Forgot %d refilled %s rate limit buckets", removed, scope)
@@ -0,0 +1,332 @@
+"""Offline end-to-end benchmark for the command layer.
+
+Drives /swap, /status and /user_orders through the real command callbacks and
+SwapService with fake Discord interactions, users and DM channels, so no Discord
+connection is needed. Reports latency percentiles, throughput, failure reasons,
+event loop lag and memory, and can save the results as JSON to compare runs:
+
+    python benchmark.py --swaps 2000 --concurrency 200 --output bench.json
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from config import config
+
+# Fake users get IDs from here up; the owner runs the owner-only commands
+OWNER_ID = 1
+FIRST_USER_ID = 100000000000000000
+
+class FakeMessage:
+    """Message returned by the fake channels"""
+
+    ids = itertools.count(1)
+
+    def __init__(self, embeds=None):
+        self.id = next(FakeMessage.ids)
+        self.embeds = embeds or []
+
+    async def edit(self, **kwargs):
+        return self
+
+class FakeChannel:
+    """DM channel that accepts every message after a simulated round trip"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.sent = 0
+
+    async def send(self, content=None, embed=None, embeds=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.sent += 1
+        return FakeMessage([embed] if embed is not None else embeds)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage()
+
+class FakeUser:
+    """User with an already open DM channel"""
+
+    def __init__(self, user_id, dm_latency):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.dm_channel = FakeChannel(dm_latency)
+
+    async def create_dm(self):
+        return self.dm_channel
+
+class FakeResponse:
+    """Interaction response that records what the command sent"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def send_message(self, content=None, embed=None, ephemeral=False, **kwargs):
+        self.done = True
+        self.interaction.record(embed)
+
+    async def defer(self, thinking=False, ephemeral=False):
+        self.done = True
+
+class FakeFollowup:
+    """Interaction webhook that records followup messages"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, embed=None, ephemeral=False, **kwargs):
+        self.interaction.record(embed)
+        return FakeMessage([embed])
+
+class FakeInteraction:
+    """The parts of discord.Interaction the commands use"""
+
+    def __init__(self, user):
+        self.user = user
+        self.guild_id = None
+        self.extras = {"startedAt": time.perf_counter()}
+        self.command = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.titles = []
+        self.descriptions = []
+
+    def record(self, embed):
+        """Remember the title and description of a message sent in response"""
+        self.titles.append(embed.title if embed is not None else None)
+        self.descriptions.append(embed.description if embed is not None else None)
+
+    @property
+    def failed(self):
+        """Whether the last message sent was an error or busy response"""
+        return not self.titles or (self.titles[-1] or "").startswith(("❌", "⏳", "🔒", "❓", "🛠️"))
+
+    @property
+    def failure_reason(self):
+        """Title and description of the last message, used to group failures"""
+        if not self.titles:
+            return "No response"
+        return f"{self.titles[-1]}: {self.descriptions[-1]}"
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task that sleeps `interval` seconds"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, errors, elapsed):
+    """Latency percentiles in milliseconds, throughput and failure reasons for one phase"""
+    values = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "calls": len(values),
+        "errors": sum(errors.values()),
+        "errorReasons": dict(errors.most_common()),
+        "elapsedSeconds": round(elapsed, 3),
+        "throughputPerSecond": round(len(values) / elapsed, 1) if elapsed > 0 else None,
+        "p50Ms": ms(percentile(values, 0.50)),
+        "p90Ms": ms(percentile(values, 0.90)),
+        "p99Ms": ms(percentile(values, 0.99)),
+        "maxMs": ms(values[-1] if values else None)
+    }
+
+def max_rss_mb():
+    """Peak resident memory of this process in MB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+async def run_phase(name, calls, concurrency):
+    """Run (callback, interaction, kwargs) calls with bounded concurrency and time each one"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    # Failure reason -> count, so a run with errors shows what went wrong
+    errors = collections.Counter()
+
+    async def run(callback, interaction, kwargs):
+        async with semaphore:
+            interaction.extras["startedAt"] = started = time.perf_counter()
+            try:
+                await callback(interaction, **kwargs)
+            except Exception as e:
+                errors[f"{type(e).__name__}: {e}"] += 1
+                logging.getLogger(__name__).error("%s call failed: %s", name, e)
+                return
+            latencies.append(time.perf_counter() - started)
+            if interaction.failed:
+                errors[interaction.failure_reason] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(*call) for call in calls))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+async def benchmark(args):
+    """Set up the bot offline, run every phase and return the results"""
+    # Imported here so the config overrides in main() are in place first
+    from bot import CoinKongBot
+    from commands import admission, swap_service
+
+    class BenchBot(CoinKongBot):
+        """Bot whose users and DM channels are fakes"""
+
+        def __init__(self):
+            super().__init__()
+            self.fake_users = {}
+
+        async def fetch_user(self, user_id):
+            user = self.fake_users.get(user_id)
+            if user is None:
+                user = self.fake_users[user_id] = FakeUser(user_id, args.dm_latency)
+            return user
+
+    bot = BenchBot()
+    await bot.setup_hook()
+    commands = {command.name: command.callback for command in bot.tree.get_commands()}
+
+    rss_before = max_rss_mb()
+    monitor = LoopLagMonitor()
+    monitor.start()
+    results = {}
+
+    rng = random.Random(args.seed)
+    tokens = [token["symbol"] for token in config["supportedTokens"]]
+    users = [FakeUser(FIRST_USER_ID + index, args.dm_latency) for index in range(args.users)]
+    owner = FakeUser(OWNER_ID, args.dm_latency)
+
+    # /swap from many users at once
+    swap_calls = []
+    for index in range(args.swaps):
+        from_currency, to_currency = rng.sample(tokens, 2)
+        swap_calls.append((commands["swap"], FakeInteraction(users[index % len(users)]), {
+            "usd_amount": round(rng.uniform(10, 1000), 2),
+            "from_currency": from_currency,
+            "to_currency": to_currency
+        }))
+    results["swap"] = await run_phase("swap", swap_calls, args.concurrency)
+
+    # /status for every swap that was created, by its owner
+    status_calls = []
+    for user in users:
+        for swap in swap_service.get_user_swaps(str(user.id)):
+            status_calls.append((commands["status"], FakeInteraction(user), {"swap_id": swap["id"]}))
+    results["status"] = await run_phase("status", status_calls, args.concurrency)
+
+    # /user_orders for every user, run by the owner
+    orders_calls = [
+        (commands["user_orders"], FakeInteraction(owner), {"user_id": str(user.id)})
+        for user in users
+    ]
+    results["user_orders"] = await run_phase("user_orders", orders_calls, args.concurrency)
+
+    # Optionally let the submitted swaps run to completion
+    drained = None
+    if args.drain:
+        started = time.perf_counter()
+        while swap_service.scheduler.jobs and time.perf_counter() - started < args.drain:
+            await asyncio.sleep(0.1)
+        drained = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "stillInFlight": len(swap_service.scheduler.jobs)
+        }
+
+    await monitor.stop()
+    lag = sorted(monitor.samples)
+    report = {
+        "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "phases": results,
+        "drain": drained,
+        "swapsCreated": len(status_calls),
+        "loopLagMs": {
+            "samples": len(lag),
+            "p50": round(percentile(lag, 0.50) * 1000, 3) if lag else None,
+            "p99": round(percentile(lag, 0.99) * 1000, 3) if lag else None,
+            "max": round(lag[-1] * 1000, 3) if lag else None
+        },
+        "memory": {
+            "maxRssBeforeMb": rss_before,
+            "maxRssAfterMb": max_rss_mb()
+        },
+        "scheduler": swap_service.scheduler.get_stats(),
+        "notifier": bot.notifier.get_stats(),
+        "admission": admission.get_stats()
+    }
+
+    await bot.close()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's commands without connecting to Discord")
+    parser.add_argument("--swaps", type=int, default=1000, help="number of /swap calls")
+    parser.add_argument("--users", type=int, default=100, help="number of distinct fake users")
+    parser.add_argument("--concurrency", type=int, default=100, help="maximum calls in flight at once")
+    parser.add_argument("--dm-latency", type=float, default=0.05, help="simulated seconds per DM send")
+    parser.add_argument("--drain", type=float, default=0, help="seconds to wait for submitted swaps to finish")
+    parser.add_argument("--admission", action="store_true", help="keep the /swap rate limits and load shedding on")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the generated swaps")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    # Keep every database and journal of the run in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="coinkong-bench-")
+    config["swapStorePath"] = os.path.join(workdir, "swaps.db")
+    config["swapJournalDir"] = os.path.join(workdir, "journal")
+    config["notificationOutboxPath"] = os.path.join(workdir, "outbox.db")
+    config["aclPath"] = os.path.join(workdir, "acl.db")
+    config["ownerId"] = str(OWNER_ID)
+    config["metricsPort"] = 0
+    if not args.admission:
+        for key in ("swapUserRate", "swapGuildRate", "swapGlobalRate", "loadShedLag"):
+            config[key] = 0
+    logging.basicConfig(level=logging.WARNING)
+
+    report = asyncio.run(benchmark(args))
+    for phase, result in report["phases"].items():
+        if result["errors"]:
+            logging.getLogger(__name__).warning(
+                "%d of %d %s calls failed; see errorReasons", result["errors"], result["calls"], phase)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -2,43 +2,146 @@ import discord
 from discord import app_commands
 import os
 import asyncio
+import logging
+import time
+import aiohttp
+import yarl
+from discord.gateway import DiscordWebSocket
 from dotenv import load_dotenv
 from config import config
-from commands import register_commands
+from commands import admission, register_commands, swap_service
+from logs import get_log_stats, setup_logging, user_id_var
+from metrics import (MetricsServer, command_latency, log_records_lost, outbox_messages, price_age,
+                     price_version, quote_cache_requests, registry, scheduler_jobs, swaps_open)
+from notifications import Notifier
 from utils import Utils
 
 # Load environment variables
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 # Create a bot instance
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 
+class CoinKongTree(app_commands.CommandTree):
+    """Command tree that tags each interaction's log records with the invoking user and times it"""
+    
+    async def interaction_check(self, interaction):
+        interaction.extras["startedAt"] = time.perf_counter()
+        user_id_var.set(str(interaction.user.id))
+        return True
+        
+    async def on_error(self, interaction, error):
+        observe_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+def observe_command(interaction, outcome):
+    """Record how long a slash command took"""
+    started = interaction.extras.get("startedAt")
+    if started is not None:
+        name = interaction.command.name if interaction.command is not None else "unknown"
+        command_latency.observe(name, outcome, value=time.perf_counter() - started)
+
 class CoinKongBot(discord.Client):
     def __init__(self):
         super().__init__(intents=intents)
-        self.tree = app_commands.CommandTree(self)
+        self.tree = CoinKongTree(self)
         self.utils = Utils()
+        self.notifier = Notifier(self)
+        self.http_session = None
+        self.metrics_server = MetricsServer(registry, config["metricsHost"], config["metricsPort"])
+        registry.add_collector(self.collect_metrics)
         
     async def setup_hook(self):
         # This is called when the bot is starting up
+        # One pooled session is shared by all outbound DEX and price traffic
+        connector = aiohttp.TCPConnector(
+            limit=config["httpPoolSize"],
+            limit_per_host=config["httpPoolPerHost"],
+            keepalive_timeout=config["httpKeepAlive"],
+            ttl_dns_cache=config["httpDnsCacheTTL"],
+            use_dns_cache=True
+        )
+        self.http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config["httpTimeout"])
+        )
+        self.utils.attach_session(self.http_session)
+        
+        # Start delivering queued DMs, including any left over from the last run
+        self.notifier.start()
+        
+        # Stream USD prices
+        self.utils.price_feed.start()
+        
+        # Pick up access list edits made while the bot is running
+        self.utils.acl.start()
+        
+        # Expose metrics for Prometheus to scrape
+        if config["metricsPort"]:
+            await self.metrics_server.start()
+        
         await register_commands(self)
         
+    async def close(self):
+        # Flush in-flight swap state and the DM outbox, then close the shared HTTP session before disconnecting
+        await admission.stop()
+        await swap_service.stop()
+        await self.metrics_server.stop()
+        await self.notifier.stop()
+        await self.utils.price_feed.stop()
+        await self.utils.acl.stop()
+        if self.http_session is not None:
+            await self.http_session.close()
+        await super().close()
+        
+    def collect_metrics(self):
+        """Copy live queue depths and counters into the metrics before a scrape"""
+        for status, swap_ids in swap_service.registry.status_index.items():
+            swaps_open.set(status, value=len(swap_ids))
+        for queue, depth in swap_service.scheduler.get_stats().items():
+            scheduler_jobs.set(queue, value=depth)
+        outbox_messages.set(value=self.notifier.get_stats()["queuedMessages"])
+        prices = self.utils.price_feed.snapshot
+        price_version.set(value=prices.version)
+        now = time.monotonic()
+        for token, ticked_at in prices.ticked_at.items():
+            price_age.set(token, value=round(now - ticked_at, 3))
+        for result, count in self.utils.quote_cache.get_stats()["total"].items():
+            quote_cache_requests.labels(result).value = count
+        for reason, count in get_log_stats().items():
+            log_records_lost.labels(reason).value = count
+        
 bot = CoinKongBot()
 
+@bot.event
+async def on_app_command_completion(interaction, command):
+    """Called after a slash command finished without raising."""
+    observe_command(interaction, "ok")
+
 @bot.event
 async def on_ready():
     """Called when the bot is ready and connected to Discord."""
-    print(f'Logged in as {bot.user.name} (ID: {bot.user.id})')
-    print(f"Bot is {'PAUSED' if config['isPaused'] else 'ACTIVE'}")
+    log.info("Logged in as %s (ID: %s)", bot.user.name, bot.user.id)
+    log.info("Bot is %s", "PAUSED" if config["isPaused"] else "ACTIVE")
     
     # Sync commands with Discord
     await bot.tree.sync()
-    print("Synced application commands")
+    log.info("Synced application commands")
 
 # Run the bot with the token from environment variables
 if __name__ == "__main__":
+    setup_logging()
+    
+    # Talk to a local stand-in (see discord_standin.py) instead of Discord
+    if config["discordApiBase"]:
+        discord.http.Route.BASE = config["discordApiBase"]
+    if config["discordGatewayUrl"]:
+        DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(config["discordGatewayUrl"])
+    
     token = os.getenv("DISCORD_BOT_TOKEN")
     if not token:
         raise ValueError("No token found. Make sure DISCORD_BOT_TOKEN is set in your environment variables.")
@@ -1,15 +1,29 @@
 import discord
 from discord import app_commands
-import asyncio
+import time
+from acl import GRANTABLE_ROLES, parse_user_id
+from admission import AdmissionControl
 from config import config
+from metrics import command_ack_latency, swaps_rejected
+from pricefeed import StalePriceError
+from records import SwapRecord
+from scheduler import SchedulerFullError
 from swap import SwapService
 
 # Initialize swap service
 swap_service = SwapService()
 
+# Rate limits and load shedding in front of /swap
+admission = AdmissionControl()
+
 async def register_commands(bot):
     """Register all commands with the bot."""
     
+    # Borrow the bot's pooled HTTP session and start processing swaps
+    swap_service.attach_session(bot.http_session)
+    swap_service.start(bot)
+    admission.start()
+    
     # User Commands
     @bot.tree.command(name="swap", description="Perform a crypto-to-crypto swap")
     @app_commands.describe(
@@ -31,7 +45,7 @@ async def register_commands(bot):
             return
             
         # Check if bot is in maintenance and user is not owner or whitelisted
-        if bot.utils.is_in_maintenance() and not (bot.utils.is_whitelisted(interaction.user.id) or bot.utils.is_owner(interaction.user.id)):
+        if bot.utils.is_in_maintenance() and not (bot.utils.is_whitelisted(interaction.user.id) or bot.utils.is_admin(interaction.user.id)):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🛠️ Maintenance Mode",
@@ -42,11 +56,24 @@ async def register_commands(bot):
             )
             return
             
-        # Validate inputs
-        from_currency = from_currency.upper()
-        to_currency = to_currency.upper()
+        # Turn new swaps away while the bot is overloaded
+        if admission.is_overloaded():
+            swaps_rejected.inc("overloaded")
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="⏳ Busy",
+                    description="The bot is handling a lot of swaps right now. Please try again in a minute.",
+                    color=0xf39c12  # Orange color
+                ),
+                ephemeral=True
+            )
+            return
+            
+        # Validate inputs (symbols, names and aliases in any case)
+        from_token = bot.utils.tokens.resolve(from_currency)
+        to_token = bot.utils.tokens.resolve(to_currency)
         
-        if not bot.utils.is_token_supported(from_currency):
+        if from_token is None:
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="❌ Invalid Currency",
@@ -57,7 +84,7 @@ async def register_commands(bot):
             )
             return
             
-        if not bot.utils.is_token_supported(to_currency):
+        if to_token is None:
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="❌ Invalid Currency",
@@ -67,7 +94,9 @@ async def register_commands(bot):
                 ephemeral=True
             )
             return
-            
+        
+        from_currency = from_token.symbol
+        to_currency = to_token.symbol
         if from_currency == to_currency:
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
@@ -102,22 +131,52 @@ async def register_commands(bot):
             )
             return
         
+        # Quote against one price snapshot, and only if both prices are fresh
+        try:
+            prices = bot.utils.price_feed.fresh_snapshot(from_currency, to_currency)
+        except StalePriceError as error:
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="⏳ Prices Unavailable",
+                    description=f"{error}. Please try again in a few minutes.",
+                    color=0xf39c12  # Orange color
+                ),
+                ephemeral=True
+            )
+            return
+        
+        # Convert USD to source cryptocurrency
+        crypto_amount = bot.utils.usd_to_crypto(usd_amount, from_currency, prices)
+        if crypto_amount <= 0:
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="❌ Conversion Error",
+                    description=f"Could not convert ${usd_amount} to {from_currency}.",
+                    color=0xe74c3c  # Red color
+                ),
+                ephemeral=True
+            )
+            return
+        
+        # Only a valid request takes a token, so mistakes never count towards the user, server or global rate limit
+        scope, retry_after = admission.admit(interaction.user.id, interaction.guild_id)
+        if scope is not None:
+            swaps_rejected.inc(scope)
+            who = {"user": "You are", "guild": "This server is", "global": "Everyone is"}[scope]
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="⏳ Slow Down",
+                    description=f"{who} starting swaps too quickly. Please try again in {max(1, round(retry_after))} seconds.",
+                    color=0xf39c12  # Orange color
+                ),
+                ephemeral=True
+            )
+            return
+            
         await interaction.response.defer(thinking=True)
+        command_ack_latency.observe("swap", value=time.perf_counter() - interaction.extras["startedAt"])
         
         try:
-            # Convert USD to source cryptocurrency
-            crypto_amount = bot.utils.usd_to_crypto(usd_amount, from_currency)
-            if crypto_amount <= 0:
-                await interaction.followup.send(
-                    embed=bot.utils.create_embed(
-                        title="❌ Conversion Error",
-                        description=f"Could not convert ${usd_amount} to {from_currency}.",
-                        color=0xe74c3c  # Red color
-                    ),
-                    ephemeral=True
-                )
-                return
-            
             # Get exchange rate
             rate_info = await bot.utils.find_best_exchange_rate(from_currency, to_currency, crypto_amount)
             estimated_amount = crypto_amount * rate_info["rate"]
@@ -136,32 +195,35 @@ async def register_commands(bot):
             swap_id = bot.utils.generate_swap_id()
             
             # In a real implementation, we would ask for the user's wallet addresses here
-            # For this demo, we'll use placeholder addresses
-            source_address = "source_wallet_address"
-            destination_address = "destination_wallet_address"
-            
-            swap_record = {
-                "id": swap_id,
-                "userId": str(interaction.user.id),
-                "fromCurrency": from_currency,
-                "toCurrency": to_currency,
-                "usdAmount": usd_amount,
-                "fromAmount": crypto_amount,
-                "toAmount": final_amount,
-                "exchangeRate": rate_info["rate"],
-                "platformFee": platform_fee,
-                "exchangeFee": exchange_fee,
-                "platformFeePercent": platform_fee_percent,
-                "exchangeFeePercent": exchange_fee_percent,
-                "fee": platform_fee_percent + exchange_fee_percent,  # Total fee percentage
-                "status": "pending",
-                "timestamp": bot.utils.get_timestamp(),
-                "sourceAddress": source_address,
-                "destinationAddress": destination_address
-            }
-            
-            # Store the swap record
-            swap_service.active_swaps[swap_id] = swap_record
+            # and pass them as source_address/destination_address; the demo has none.
+            # Amounts are kept in minor units; fees and display strings are derived when read
+            swap_record = SwapRecord(
+                id=swap_id,
+                user_id=interaction.user.id,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                usd_amount=usd_amount,
+                from_amount=crypto_amount,
+                to_amount=final_amount,
+                exchange_rate=rate_info["rate"],
+                platform_fee_percent=platform_fee_percent,
+                exchange_fee_percent=exchange_fee_percent,
+                price_version=prices.version  # USD price snapshot the amounts were quoted from
+            )
+            
+            # Store the swap record and queue it for processing
+            try:
+                swap_service.submit_swap(swap_record)
+            except SchedulerFullError:
+                await interaction.followup.send(
+                    embed=bot.utils.create_embed(
+                        title="⏳ Busy",
+                        description="Too many swaps are being processed right now. Please try again in a few minutes.",
+                        color=0xf39c12  # Orange color
+                    ),
+                    ephemeral=True
+                )
+                return
             
             # Create response embed
             embed = bot.utils.create_embed(
@@ -183,9 +245,6 @@ async def register_commands(bot):
             
             await interaction.followup.send(embed=embed)
             
-            # Process the swap
-            asyncio.create_task(swap_service.process_swap(bot, swap_record))
-            
         except Exception as error:
             await interaction.followup.send(
                 embed=bot.utils.create_embed(
@@ -196,6 +255,23 @@ async def register_commands(bot):
                 ephemeral=True
             )
 
+    @swap_command.autocomplete("from_currency")
+    async def from_currency_autocomplete(interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=f"{token.symbol} ({token.name})", value=token.symbol)
+            for token in bot.utils.tokens.complete(current)
+        ]
+
+    @swap_command.autocomplete("to_currency")
+    async def to_currency_autocomplete(interaction: discord.Interaction, current: str):
+        # Leave out the source token the user already picked
+        from_token = bot.utils.tokens.resolve(interaction.namespace.from_currency or "")
+        return [
+            app_commands.Choice(name=f"{token.symbol} ({token.name})", value=token.symbol)
+            for token in bot.utils.tokens.complete(current)
+            if token is not from_token
+        ]
+
     @bot.tree.command(name="status", description="Check the status of a swap")
     @app_commands.describe(swap_id="The ID of the swap to check")
     async def status_command(interaction: discord.Interaction, swap_id: str):
@@ -211,10 +287,10 @@ async def register_commands(bot):
             )
             return
         
-        # Get all swaps (active and completed)
-        all_swaps = swap_service.get_all_swaps()
+        # Look up the swap by ID
+        swap = swap_service.get_swap(swap_id)
             
-        if swap_id not in all_swaps:
+        if swap is None:
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="❓ Not Found",
@@ -224,11 +300,9 @@ async def register_commands(bot):
                 ephemeral=True
             )
             return
-            
-        swap = all_swaps[swap_id]
         
         # Check if this swap belongs to the user
-        if swap["userId"] != str(interaction.user.id) and not bot.utils.is_owner(interaction.user.id):
+        if swap["userId"] != str(interaction.user.id) and not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -287,8 +361,71 @@ async def register_commands(bot):
         
         await interaction.response.send_message(embed=embed)
 
-    @bot.tree.command(name="supported_tokens", description="List all supported cryptocurrencies")
-    async def supported_tokens_command(interaction: discord.Interaction):
+    @status_command.autocomplete("swap_id")
+    async def swap_id_autocomplete(interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=label[:100], value=swap_id)
+            for swap_id, label in swap_service.suggest_swaps(str(interaction.user.id), current)
+        ]
+
+    @bot.tree.command(name="quote_many", description="Get quotes for several swaps at once without swapping")
+    @app_commands.describe(legs="Comma-separated legs of [usd_amount] [from_currency] [to_currency], e.g. 100 BTC ETH, 50 ETH SOL")
+    async def quote_many_command(interaction: discord.Interaction, legs: str):
+        # Check if user can use the bot
+        if not bot.utils.can_use_bot(interaction.user.id):
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="❌ Access Denied",
+                    description="You are not allowed to use this command.",
+                    color=0xe74c3c  # Red color
+                ),
+                ephemeral=True
+            )
+            return
+        
+        try:
+            parsed_legs = bot.utils.parse_quote_legs(legs)
+            if not parsed_legs:
+                raise ValueError("Please provide at least one quote leg.")
+            if len(parsed_legs) > config["maxQuoteLegs"]:
+                raise ValueError(f"At most {config['maxQuoteLegs']} legs can be quoted at once.")
+            
+            quotes = bot.utils.quote_many(parsed_legs)
+        except ValueError as error:
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="❌ Invalid Quote Request",
+                    description=f"{str(error)} Use /supported_tokens to see available options.",
+                    color=0xe74c3c  # Red color
+                ),
+                ephemeral=True
+            )
+            return
+        
+        fields = []
+        for quote in quotes:
+            name = f"💱 ${quote['usdAmount']:.2f} {quote['fromCurrency']} → {quote['toCurrency']}"
+            if "error" in quote:
+                fields.append({"name": name, "value": f"❌ {quote['error']}"})
+                continue
+            
+            fields.append({"name": name, "value": "\n".join([
+                f"{bot.utils.format_currency(quote['fromAmount'], quote['fromCurrency'])} → {bot.utils.format_currency(quote['toAmount'], quote['toCurrency'])}",
+                f"📈 1 {quote['fromCurrency']} = {quote['rate']} {quote['toCurrency']}",
+                f"💵 Fees: {quote['exchangeFeePercent'] + quote['platformFeePercent']:.2f}% ({bot.utils.format_currency(quote['totalFee'], quote['toCurrency'])})"
+            ])})
+        
+        embed = bot.utils.create_embed(
+            title="📊 Swap Quotes",
+            description="Estimated amounts for your requested swaps. Quotes are indicative and no swap has been created.",
+            fields=fields,
+            color=0x3498db  # Blue color
+        )
+        
+        await interaction.response.send_message(embed=embed)
+
+    # Static embeds are built once and rebuilt only after a config change
+    def build_supported_tokens_embed():
         tokens = config["supportedTokens"]
         
         # Create a formatted list of tokens with emojis
@@ -315,10 +452,9 @@ async def register_commands(bot):
             color=0x3498db  # Blue color
         )
         
-        await interaction.response.send_message(embed=embed)
+        return embed
 
-    @bot.tree.command(name="support", description="Get support information")
-    async def support_command(interaction: discord.Interaction):
+    def build_support_embed():
         embed = bot.utils.create_embed(
             title="🆘 CoinKong Support",
             description="Need help with CoinKong Bot?",
@@ -332,13 +468,13 @@ async def register_commands(bot):
             color=0x9b59b6  # Purple color
         )
         
-        await interaction.response.send_message(embed=embed)
+        return embed
 
-    @bot.tree.command(name="help", description="Display bot usage instructions")
-    async def help_command(interaction: discord.Interaction):
+    def build_help_embed():
         user_commands = [
             "• `/swap [usd_amount] [from_currency] [to_currency]` - Perform a crypto-to-crypto swap",
             "• `/status [swap_id]` - Check the status of a swap",
+            "• `/quote_many [legs]` - Get quotes for several swaps at once",
             "• `/supported_tokens` - List all supported cryptocurrencies",
             "• `/support` - Get support information",
             "• `/help` - Display this help message"
@@ -351,7 +487,9 @@ async def register_commands(bot):
             "• `/whitelist [userid]` - Allow a user to use the bot during maintenance",
             "• `/blacklist [userid]` - Prevent a user from using the bot",
             "• `/show_order [swap_id]` - Show detailed information about a swap",
-            "• `/user_orders [userid]` - List all swaps initiated by a user"
+            "• `/user_orders [userid] [before]` - List the swaps initiated by a user, newest first",
+            "• `/grant_role [userid] [role]` - Give a user the admin, whitelist or blacklist role (owner only)",
+            "• `/revoke_role [userid] [role]` - Remove a role from a user (owner only)"
         ]
         
         embed = bot.utils.create_embed(
@@ -359,18 +497,34 @@ async def register_commands(bot):
             description="Here are the available commands:",
             fields=[
                 {"name": "👤 User Commands", "value": "\n".join(user_commands)},
-                {"name": "👑 Owner Commands", "value": "\n".join(owner_commands)}
+                {"name": "👑 Owner & Admin Commands", "value": "\n".join(owner_commands)}
             ],
             color=0x3498db  # Blue color
         )
         
-        await interaction.response.send_message(embed=embed)
+        return embed
+
+    bot.utils.embed_templates.register("supported_tokens", build_supported_tokens_embed)
+    bot.utils.embed_templates.register("support", build_support_embed)
+    bot.utils.embed_templates.register("help", build_help_embed)
+
+    @bot.tree.command(name="supported_tokens", description="List all supported cryptocurrencies")
+    async def supported_tokens_command(interaction: discord.Interaction):
+        await interaction.response.send_message(embed=bot.utils.embed_templates.get("supported_tokens"))
+
+    @bot.tree.command(name="support", description="Get support information")
+    async def support_command(interaction: discord.Interaction):
+        await interaction.response.send_message(embed=bot.utils.embed_templates.get("support"))
+
+    @bot.tree.command(name="help", description="Display bot usage instructions")
+    async def help_command(interaction: discord.Interaction):
+        await interaction.response.send_message(embed=bot.utils.embed_templates.get("help"))
 
     # Owner Commands
     @bot.tree.command(name="set_fee", description="Adjust the platform fee percentage")
     @app_commands.describe(percentage="New fee percentage (0.0-100.0)")
     async def set_fee_command(interaction: discord.Interaction, percentage: float):
-        if not bot.utils.is_owner(interaction.user.id):
+        if not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -394,6 +548,9 @@ async def register_commands(bot):
             
         config["defaultFee"] = percentage
         
+        # The support embed shows the fee, so rebuild the static embeds
+        bot.utils.embed_templates.invalidate()
+        
         await interaction.response.send_message(
             embed=bot.utils.create_embed(
                 title="✅ Fee Updated",
@@ -404,7 +561,7 @@ async def register_commands(bot):
 
     @bot.tree.command(name="pause", description="Temporarily disable swaps for maintenance")
     async def pause_command(interaction: discord.Interaction):
-        if not bot.utils.is_owner(interaction.user.id):
+        if not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -427,7 +584,7 @@ async def register_commands(bot):
 
     @bot.tree.command(name="resume", description="Re-enable swaps after maintenance")
     async def resume_command(interaction: discord.Interaction):
-        if not bot.utils.is_owner(interaction.user.id):
+        if not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -451,7 +608,7 @@ async def register_commands(bot):
     @bot.tree.command(name="whitelist", description="Allow a user to use the bot during maintenance")
     @app_commands.describe(user_id="Discord user ID to whitelist")
     async def whitelist_command(interaction: discord.Interaction, user_id: str):
-        if not bot.utils.is_owner(interaction.user.id):
+        if not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -462,7 +619,19 @@ async def register_commands(bot):
             )
             return
             
-        if user_id in config["whitelistedUsers"]:
+        target_id = parse_user_id(user_id)
+        if target_id is None:
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="❌ Invalid User ID",
+                    description=f"{user_id} is not a valid Discord user ID.",
+                    color=0xe74c3c  # Red color
+                ),
+                ephemeral=True
+            )
+            return
+            
+        if not bot.utils.acl.grant(target_id, "whitelist"):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="ℹ️ Already Whitelisted",
@@ -473,8 +642,6 @@ async def register_commands(bot):
             )
             return
             
-        config["whitelistedUsers"].append(user_id)
-        
         await interaction.response.send_message(
             embed=bot.utils.create_embed(
                 title="✅ User Whitelisted",
@@ -486,7 +653,7 @@ async def register_commands(bot):
     @bot.tree.command(name="blacklist", description="Prevent a user from using the bot")
     @app_commands.describe(user_id="Discord user ID to blacklist")
     async def blacklist_command(interaction: discord.Interaction, user_id: str):
-        if not bot.utils.is_owner(interaction.user.id):
+        if not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -497,7 +664,19 @@ async def register_commands(bot):
             )
             return
             
-        if user_id in config["blacklistedUsers"]:
+        target_id = parse_user_id(user_id)
+        if target_id is None:
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="❌ Invalid User ID",
+                    description=f"{user_id} is not a valid Discord user ID.",
+                    color=0xe74c3c  # Red color
+                ),
+                ephemeral=True
+            )
+            return
+            
+        if not bot.utils.acl.grant(target_id, "blacklist"):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="ℹ️ Already Blacklisted",
@@ -508,8 +687,6 @@ async def register_commands(bot):
             )
             return
             
-        config["blacklistedUsers"].append(user_id)
-        
         await interaction.response.send_message(
             embed=bot.utils.create_embed(
                 title="✅ User Blacklisted",
@@ -518,10 +695,71 @@ async def register_commands(bot):
             )
         )
 
+    @bot.tree.command(name="grant_role", description="Give a user the admin, whitelist or blacklist role")
+    @app_commands.describe(user_id="Discord user ID", role="Role to grant")
+    @app_commands.choices(role=[app_commands.Choice(name=role, value=role) for role in GRANTABLE_ROLES])
+    async def grant_role_command(interaction: discord.Interaction, user_id: str, role: str):
+        await change_role(interaction, user_id, role, grant=True)
+
+    @bot.tree.command(name="revoke_role", description="Remove the admin, whitelist or blacklist role from a user")
+    @app_commands.describe(user_id="Discord user ID", role="Role to remove")
+    @app_commands.choices(role=[app_commands.Choice(name=role, value=role) for role in GRANTABLE_ROLES])
+    async def revoke_role_command(interaction: discord.Interaction, user_id: str, role: str):
+        await change_role(interaction, user_id, role, grant=False)
+
+    async def change_role(interaction, user_id, role, grant):
+        # Only the owner can hand out roles
+        if not bot.utils.is_owner(interaction.user.id):
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="🔒 Access Denied",
+                    description="You don't have permission to use this command.",
+                    color=0xe74c3c  # Red color
+                ),
+                ephemeral=True
+            )
+            return
+            
+        target_id = parse_user_id(user_id)
+        if target_id is None:
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="❌ Invalid User ID",
+                    description=f"{user_id} is not a valid Discord user ID.",
+                    color=0xe74c3c  # Red color
+                ),
+                ephemeral=True
+            )
+            return
+            
+        if grant:
+            changed = bot.utils.acl.grant(target_id, role)
+        else:
+            changed = bot.utils.acl.revoke(target_id, role)
+        
+        if not changed:
+            await interaction.response.send_message(
+                embed=bot.utils.create_embed(
+                    title="ℹ️ No Change",
+                    description=f"User {user_id} {'already has' if grant else 'does not have'} the {role} role.",
+                    color=0x3498db  # Blue color
+                ),
+                ephemeral=True
+            )
+            return
+            
+        await interaction.response.send_message(
+            embed=bot.utils.create_embed(
+                title="✅ Role Updated",
+                description=f"User {user_id} has been {'given' if grant else 'removed from'} the {role} role.",
+                color=0x2ecc71  # Green color
+            )
+        )
+
     @bot.tree.command(name="show_order", description="Show detailed information about a swap")
     @app_commands.describe(swap_id="The ID of the swap to view")
     async def show_order_command(interaction: discord.Interaction, swap_id: str):
-        if not bot.utils.is_owner(interaction.user.id):
+        if not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -532,10 +770,10 @@ async def register_commands(bot):
             )
             return
         
-        # Get all swaps (active and completed)
-        all_swaps = swap_service.get_all_swaps()
+        # Look up the swap by ID
+        swap = swap_service.get_swap(swap_id)
             
-        if swap_id not in all_swaps:
+        if swap is None:
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="❓ Not Found",
@@ -546,7 +784,6 @@ async def register_commands(bot):
             )
             return
             
-        swap = all_swaps[swap_id]
         formatted_swap = bot.utils.format_swap_record(swap)
         
         # Create a detailed embed with all swap information
@@ -575,10 +812,13 @@ async def register_commands(bot):
         
         await interaction.response.send_message(embed=embed)
 
-    @bot.tree.command(name="user_orders", description="List all swaps initiated by a user")
-    @app_commands.describe(user_id="Discord user ID to check")
-    async def user_orders_command(interaction: discord.Interaction, user_id: str):
-        if not bot.utils.is_owner(interaction.user.id):
+    @bot.tree.command(name="user_orders", description="List the swaps initiated by a user, newest first")
+    @app_commands.describe(
+        user_id="Discord user ID to check",
+        before="Only show swaps older than this swap ID (the last ID of the previous page)"
+    )
+    async def user_orders_command(interaction: discord.Interaction, user_id: str, before: str = None):
+        if not bot.utils.is_admin(interaction.user.id):
             await interaction.response.send_message(
                 embed=bot.utils.create_embed(
                     title="🔒 Access Denied",
@@ -589,9 +829,9 @@ async def register_commands(bot):
             )
             return
         
-        # Get all swaps from both active and completed
-        all_swaps = swap_service.get_all_swaps()
-        user_swaps = [swap for swap in all_swaps.values() if swap["userId"] == user_id]
+        # Get one page of the user's swaps; swap IDs sort by creation time, so the page boundary is just an ID
+        page_size = config["historyPageSize"]
+        user_swaps = swap_service.get_user_swaps_page(user_id, before, page_size)
         
         if not user_swaps:
             await interaction.response.send_message(
@@ -618,10 +858,16 @@ async def register_commands(bot):
             for swap in user_swaps
         ])
         
+        if len(user_swaps) == page_size:
+            swap_list += f"\n\nUse `before: {user_swaps[-1]['id']}` to see older swaps."
+        
         embed = bot.utils.create_embed(
             title=f"📋 Swaps for User {user_id}",
-            description=f"Found {len(user_swaps)} swaps:\n\n{swap_list}",
+            description=f"Showing {len(user_swaps)} swaps, newest first:\n\n{swap_list}",
             color=0x3498db  # Blue color
         )
         
         await interaction.response.send_message(embed=embed)
+
+    # Build the static embeds now rather than on the first interaction
+    bot.utils.embed_templates.build_all()
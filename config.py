@@ -1,43 +1,124 @@
 
+import logging
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Debug output to check environment variables
-print(f"Environment variables loaded: {list(os.environ.keys())}")
-print(f"OWNER_ID environment variable: {os.getenv('OWNER_ID')}")
-
 # Bot configuration settings
 config = {
     # Bot settings
     "prefix": "/",
     "token": os.getenv("DISCORD_BOT_TOKEN"),  # Set this as an environment variable when deploying
     "clientId": os.getenv("DISCORD_CLIENT_ID"),  # Set this as an environment variable when deploying
+    "discordApiBase": os.getenv("DISCORD_API_BASE"),  # Override the Discord REST URL, e.g. to use discord_standin.py
+    "discordGatewayUrl": os.getenv("DISCORD_GATEWAY_URL"),  # Override the Discord gateway URL
     
     # Service settings
     "defaultFee": 0.5,  # Default platform fee in percentage
     "minimumSwapAmountUSD": 1,  # Minimum swap amount in USD
+    "maxQuoteLegs": 10,  # Maximum number of legs in a single /quote_many request
     
+    # Storage settings
+    "swapStorePath": os.getenv("SWAP_STORE_PATH", "swaps.db"),  # SQLite database holding every swap record
+    "swapCacheSize": 1000,  # Maximum number of finished swaps kept in memory
+    "swapIdShard": int(os.getenv("SWAP_ID_SHARD", "0")),  # 0-1023; give every bot process sharing a store its own shard
+    "userIndexCacheSize": 10000,  # Users whose swap ID lists are kept in memory
+    "historyPageSize": 20,  # Swaps shown per page of /user_orders
+    "recentSwapsPerUser": 10,  # Latest swaps per user suggested by /status autocomplete
+    "recentSwapUsers": 50000,  # Users whose latest swaps are kept in memory for autocomplete
+
+    # Swap journal settings
+    "swapJournalDir": os.getenv("SWAP_JOURNAL_DIR", "journal"),  # Directory holding the swap journal and snapshots
+    "journalFlushInterval": 0.05,  # Seconds between batched journal fsyncs
+    "journalFlushBatch": 256,  # Journal entries that trigger an early fsync
+    "journalSnapshotInterval": 300,  # Seconds between snapshots of the open swaps
+
+    # Swap processing settings
+    "swapWorkers": 32,  # Number of workers running swap stages concurrently
+    "maxInFlightSwaps": 10000,  # New swaps are rejected once this many are in flight
+    "swapStageDeadlines": {"pending": 30, "initiating": 60, "processing": 60},  # Seconds each stage may take
+
+    # Swap admission settings (a rate of 0 disables that limit)
+    "swapUserRate": 0.2,  # Swaps per second each user may start over time
+    "swapUserBurst": 3,  # Swaps a user may start back to back
+    "swapGuildRate": 5,  # Swaps per second each server may start over time
+    "swapGuildBurst": 30,  # Swaps a server may start back to back
+    "swapGlobalRate": 100,  # Swaps per second the bot starts over time
+    "swapGlobalBurst": 500,  # Swaps the bot starts back to back
+    "rateLimitSweepInterval": 60,  # Seconds between pruning refilled rate limit buckets
+    "loadShedLag": 0.25,  # Seconds of event loop lag above which new swaps are rejected (0 disables)
+    "loadShedInterval": 0.1,  # Seconds between event loop lag measurements
+
+    # Access control settings
+    "aclPath": os.getenv("ACL_PATH", "acl.db"),  # SQLite database holding admin, whitelist and blacklist entries
+    "aclReloadInterval": 5,  # Seconds between checks for access list changes made outside the bot
+
+    # Logging settings
+    "logLevel": os.getenv("LOG_LEVEL", "INFO"),  # Minimum level written to the log
+    "logLevels": {"discord": "WARNING"},  # Per-logger level overrides
+    "logQueueSize": 10000,  # Log records buffered for the writer thread; extra records are dropped
+    "logSamplePerSecond": 50,  # Records below WARNING each logger may emit per second before sampling starts
+    "logSampleEvery": 20,  # Once sampling, keep one record in this many
+
+    # Metrics settings
+    "metricsHost": os.getenv("METRICS_HOST", "127.0.0.1"),  # Address the Prometheus metrics endpoint listens on
+    "metricsPort": int(os.getenv("METRICS_PORT", "9108")),  # Port of the metrics endpoint (0 disables it)
+
+    # Notification settings
+    "notificationOutboxPath": os.getenv("NOTIFICATION_OUTBOX_PATH", "outbox.db"),  # SQLite outbox of undelivered DMs
+    "notificationMode": "dm",  # "dm" sends a DM per swap stage, "live" edits one status message per swap
+    "liveEditDebounce": 1.0,  # Seconds live status edits are held so quick transitions collapse into one
+    "dmSenders": 4,  # Number of concurrent DM senders
+    "dmMaxAttempts": 5,  # Delivery attempts before a DM is dropped
+    "dmCacheSize": 10000,  # Maximum number of cached DM channels
+    "dmCacheTTL": 3600,  # Seconds a DM channel stays cached
+
+    # USD price feed settings
+    "priceFeedSource": os.getenv("PRICE_FEED_SOURCE", "mock"),  # "mock", "file:<path>" or "tcp:<host>:<port>" (JSON lines)
+    "priceFeedMaxAge": 60,  # Seconds without a tick before a token's USD price is stale and swaps in it are blocked
+    "priceFeedPublishInterval": 0.25,  # Minimum seconds between published price snapshots
+    "priceFeedMockInterval": 1.0,  # Seconds between ticks from the mock source
+
+    # Quote cache settings
+    "quoteCacheTTL": 15,  # Seconds a quote is served without refetching
+    "quoteCacheStaleTTL": 30,  # Extra seconds a stale quote is served while it refreshes in the background
+    "quoteCacheSize": 256,  # Maximum number of cached pairs
+    "quoteCachePairTTL": {},  # Per-pair TTL overrides, e.g. {"BTC-ETH": 5}
+
+    # DEX quote aggregation settings
+    "dexQuoteTimeout": 1.5,  # Seconds before a single DEX quote attempt is abandoned
+    "dexQuoteHedgeDelay": 0.4,  # Seconds to wait on a DEX before firing a hedged retry
+    "dexQuoteMaxAttempts": 2,  # Maximum concurrent attempts per DEX
+    "dexQuoteQuorum": 3,  # Number of DEX quotes to wait for before picking the best
+    "dexQuoteDeadline": 2.0,  # Seconds after which the best quote so far is used
+
+    # Outbound HTTP connection pool settings
+    "httpPoolSize": 100,  # Maximum open connections in total
+    "httpPoolPerHost": 10,  # Maximum open connections per host
+    "httpKeepAlive": 30,  # Seconds an idle connection is kept open for reuse
+    "httpDnsCacheTTL": 300,  # Seconds a DNS lookup is cached
+    "httpTimeout": 10,  # Total seconds allowed per request
+
     # Bot state
     "isPaused": False,
     
-    # User lists
+    # User lists, used to seed the access control database on first run
     "whitelistedUsers": [],
     "blacklistedUsers": [],
     
-    # Supported cryptocurrencies and their networks
+    # Supported cryptocurrencies, their networks, decimal places and the other names users may type
     "supportedTokens": [
-        {"symbol": "BTC", "name": "Bitcoin", "network": "Bitcoin"},
-        {"symbol": "ETH", "name": "Ethereum", "network": "Ethereum"},
-        {"symbol": "LTC", "name": "Litecoin", "network": "Litecoin"},
-        {"symbol": "XRP", "name": "Ripple", "network": "Ripple"},
-        {"symbol": "SOL", "name": "Solana", "network": "Solana"},
-        {"symbol": "DOGE", "name": "Dogecoin", "network": "Dogecoin"},
-        {"symbol": "BCH", "name": "Bitcoin Cash", "network": "Bitcoin Cash"},
-        {"symbol": "XMR", "name": "Monero", "network": "Monero"},
-        {"symbol": "TRX", "name": "Tron", "network": "Tron"}
+        {"symbol": "BTC", "name": "Bitcoin", "network": "Bitcoin", "decimals": 8, "aliases": ["xbt"]},
+        {"symbol": "ETH", "name": "Ethereum", "network": "Ethereum", "decimals": 18, "aliases": ["ether"]},
+        {"symbol": "LTC", "name": "Litecoin", "network": "Litecoin", "decimals": 8, "aliases": []},
+        {"symbol": "XRP", "name": "Ripple", "network": "Ripple", "decimals": 6, "aliases": []},
+        {"symbol": "SOL", "name": "Solana", "network": "Solana", "decimals": 9, "aliases": []},
+        {"symbol": "DOGE", "name": "Dogecoin", "network": "Dogecoin", "decimals": 8, "aliases": ["xdg"]},
+        {"symbol": "BCH", "name": "Bitcoin Cash", "network": "Bitcoin Cash", "decimals": 8, "aliases": ["bcc"]},
+        {"symbol": "XMR", "name": "Monero", "network": "Monero", "decimals": 12, "aliases": []},
+        {"symbol": "TRX", "name": "Tron", "network": "Tron", "decimals": 6, "aliases": ["tronix"]}
     ],
     
     # DEX APIs
@@ -53,11 +134,6 @@ config = {
     "ownerId": os.getenv("OWNER_ID")
 }
 
-# Print owner ID for debugging
-print(f"Owner ID loaded: {config['ownerId']}")
-
-# If owner ID is None, print a warning
+# Owner commands are unavailable without an owner
 if config['ownerId'] is None:
-    print("WARNING: Owner ID not found in environment variables!")
-    print("Make sure your .env file contains: OWNER_ID=1162870651393146891")
-    print("Current environment variables:", os.environ.keys())
+    logging.getLogger(__name__).warning("OWNER_ID is not set; add OWNER_ID=<your Discord user ID> to your .env file")
@@ -0,0 +1,125 @@
+import asyncio
+import random
+import time
+from metrics import dex_latency
+
+class DexProvider:
+    """Quote source for a single DEX (simulated for demo)"""
+
+    def __init__(self, name, url, fetch_rate):
+        self.name = name
+        self.url = url
+        self.fetch_rate = fetch_rate
+
+        # Shared HTTP session, attached by the bot on startup
+        self.session = None
+
+    async def request(self, path, params=None):
+        """Send a GET request to the DEX API over the shared session"""
+        async with self.session.get(f"{self.url}{path}", params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def get_quote(self, from_currency, to_currency, amount):
+        """Get a quote from the DEX"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            # In a real implementation, this would call self.request() against the DEX API.
+            # For this demo, we simulate network latency and use the mock rates.
+            await asyncio.sleep(random.uniform(0.05, 0.5))
+            quote = await self.fetch_rate(from_currency, to_currency)
+            outcome = "ok"
+            return {**quote, "source": self.name}
+        except asyncio.CancelledError:
+            # Timed out, or a hedged attempt won first
+            outcome = "cancelled"
+            raise
+        finally:
+            dex_latency.observe(self.name, "quote", outcome, value=time.perf_counter() - started)
+
+class DexAggregator:
+    """Queries every configured DEX concurrently and picks the best net-of-fees quote.
+
+    Each provider gets a per-attempt timeout and a hedged retry: if an attempt
+    has not answered within `hedge_delay` (or fails), another one is started and
+    the first success wins. The aggregate returns as soon as `quorum` providers
+    have answered or the overall `deadline` passes, whichever comes first.
+    """
+
+    def __init__(self, providers, timeout, hedge_delay, max_attempts, quorum, deadline):
+        self.providers = providers
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.max_attempts = max_attempts
+        self.quorum = quorum
+        self.deadline = deadline
+
+    @staticmethod
+    def net_rate(quote):
+        """Get the rate a user actually receives after the exchange fee"""
+        return quote["rate"] * (1 - quote["exchangeFeePercent"] / 100)
+
+    async def get_best_quote(self, from_currency, to_currency, amount):
+        """Get the best quote across all providers"""
+        deadline = time.monotonic() + self.deadline
+        pending = {
+            asyncio.ensure_future(self._query_provider(provider, from_currency, to_currency, amount))
+            for provider in self.providers
+        }
+        quotes = []
+        last_error = None
+
+        try:
+            while pending and len(quotes) < self.quorum:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        quotes.append(task.result())
+                    else:
+                        last_error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if not quotes:
+            if last_error is not None and not isinstance(last_error, asyncio.TimeoutError):
+                raise last_error
+            raise ValueError(f"No exchange answered in time for {from_currency}-{to_currency}")
+
+        return max(quotes, key=self.net_rate)
+
+    async def _query_provider(self, provider, from_currency, to_currency, amount):
+        """Query one provider with a per-attempt timeout and hedged retries"""
+        attempts = set()
+        last_error = None
+
+        try:
+            for _ in range(self.max_attempts):
+                attempts.add(asyncio.ensure_future(
+                    asyncio.wait_for(provider.get_quote(from_currency, to_currency, amount), self.timeout)
+                ))
+
+                # Give the outstanding attempts a head start before hedging
+                done, attempts = await asyncio.wait(attempts, timeout=self.hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+
+            # Every attempt has been started; wait for whichever finishes first
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+
+            raise last_error
+        finally:
+            for task in attempts:
+                task.cancel()
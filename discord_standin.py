@@ -0,0 +1,650 @@
+"""Local stand-in for the Discord gateway and REST API, for load and soak tests.
+
+Implements the parts of Discord that CoinKongBot uses: login, the gateway
+handshake and heartbeats, slash command sync, interaction callbacks and
+followups, fetch_user, DM channels and messages. Once the bot has identified, a
+load generator dispatches synthetic /swap, /status and /supported_tokens
+interactions from many fake users. REST calls get injected latency and real
+429 responses: per-route buckets, a global limit and random extra 429s, all
+with the rate limit headers discord.py honours.
+
+Start the stand-in, then point the bot at it:
+
+    python discord_standin.py --rate 20 --duration 3600 --output soak.json
+    DISCORD_API_BASE=http://127.0.0.1:8765/api/v10 \\
+    DISCORD_GATEWAY_URL=ws://127.0.0.1:8765/gateway \\
+    DISCORD_BOT_TOKEN=local python bot.py
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from aiohttp import WSMsgType, web
+
+log = logging.getLogger("discord_standin")
+
+# Discord's epoch for snowflake IDs (2015-01-01)
+DISCORD_EPOCH_MS = 1420070400000
+
+# Interactions must be acknowledged within this many seconds
+INTERACTION_TIMEOUT = 3.0
+
+# Fake users get IDs from here up
+FIRST_USER_ID = 100000000000000000
+
+# Owner of the fake application
+OWNER_ID = 1
+
+# Title prefixes of the bot's error and busy embeds
+ERROR_TITLES = ("❌", "⏳", "🔒", "❓", "🛠️")
+
+class Snowflakes:
+    """Generates Discord-style snowflake IDs"""
+
+    def __init__(self):
+        self.sequence = itertools.count()
+
+    def next(self):
+        return ((int(time.time() * 1000) - DISCORD_EPOCH_MS) << 22) | (next(self.sequence) & 0x3FFFFF)
+
+class RateLimitBucket:
+    """Fixed-window limit of `limit` requests every `per` seconds"""
+
+    def __init__(self, name, limit, per):
+        self.name = name
+        self.limit = limit
+        self.per = per
+        self.window_start = 0.0
+        self.used = 0
+
+    def take(self):
+        """Use one request. Returns (allowed, remaining, reset_after)."""
+        now = time.monotonic()
+        if now - self.window_start >= self.per:
+            self.window_start = now
+            self.used = 0
+        reset_after = self.per - (now - self.window_start)
+        if self.used >= self.limit:
+            return False, 0, reset_after
+        self.used += 1
+        return True, self.limit - self.used, reset_after
+
+class GatewayConnection:
+    """One bot connection to the fake gateway"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.sequence = 0
+
+class PendingInteraction:
+    """An interaction dispatched to the bot and what has happened to it since"""
+
+    __slots__ = ("id", "token", "command", "user_id", "dispatched_at", "acked_at", "ack_type", "responded_at", "failed")
+
+    def __init__(self, interaction_id, token, command, user_id):
+        self.id = interaction_id
+        self.token = token
+        self.command = command
+        self.user_id = user_id
+        self.dispatched_at = time.monotonic()
+        self.acked_at = None
+        self.ack_type = None
+        self.responded_at = None
+        self.failed = False
+
+class DiscordStandIn:
+    """In-process fake of the Discord gateway and REST API with a load generator"""
+
+    # Route buckets: (limit, per seconds), roughly Discord's published defaults
+    ROUTE_LIMITS = {
+        "channel_messages": (5, 5.0),
+        "message_edits": (5, 5.0),
+        "dm_open": (10, 10.0),
+        "users": (30, 1.0),
+        "commands": (2, 20.0),
+        "webhook": (30, 2.0)
+    }
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.snowflakes = Snowflakes()
+        self.application_id = self.snowflakes.next()
+        self.bot_user = self._user_payload(self.snowflakes.next(), "CoinKong", bot=True)
+
+        self.sockets = set()
+        self.commands = {}
+        self.users = [FIRST_USER_ID + index for index in range(args.users)]
+        self.dm_channels = {}
+        self.swap_ids = {}
+
+        self.interactions = {}
+        self.interactions_by_token = {}
+        self.buckets = {}
+        self.global_bucket = RateLimitBucket("global", args.global_limit, 1.0)
+
+        self.load_task = None
+        self.started_at = None
+        self.stats = Counter()
+        self.rate_limited = Counter()
+        self.ack_latencies = []
+        self.response_latencies = []
+
+    def app(self):
+        """Build the aiohttp application"""
+        app = web.Application(middlewares=[self.rest_middleware])
+        api = "/api/v{version}"
+        app.router.add_get("/gateway", self.handle_gateway)
+        app.router.add_get("/_stats", self.handle_stats)
+        app.router.add_get(api + "/gateway", self.handle_gateway_url)
+        app.router.add_get(api + "/gateway/bot", self.handle_gateway_url)
+        app.router.add_get(api + "/users/@me", self.handle_me)
+        app.router.add_get(api + "/oauth2/applications/@me", self.handle_application)
+        app.router.add_put(api + "/applications/{app}/commands", self.handle_sync)
+        app.router.add_get(api + "/applications/{app}/commands", self.handle_list_commands)
+        app.router.add_post(api + "/interactions/{id}/{token}/callback", self.handle_callback)
+        app.router.add_post(api + "/webhooks/{app}/{token}", self.handle_followup)
+        app.router.add_get(api + "/webhooks/{app}/{token}/messages/{message}", self.handle_webhook_message)
+        app.router.add_patch(api + "/webhooks/{app}/{token}/messages/{message}", self.handle_webhook_message)
+        app.router.add_get(api + "/users/{user}", self.handle_user)
+        app.router.add_post(api + "/users/@me/channels", self.handle_open_dm)
+        app.router.add_post(api + "/channels/{channel}/messages", self.handle_channel_message)
+        app.router.add_patch(api + "/channels/{channel}/messages/{message}", self.handle_edit_message)
+        return app
+
+    # REST plumbing
+
+    @web.middleware
+    async def rest_middleware(self, request, handler):
+        """Apply latency, rate limits and injected 429s to every REST call"""
+        if not request.path.startswith("/api/"):
+            return await handler(request)
+
+        self.stats["restRequests"] += 1
+        await asyncio.sleep(self.rng.uniform(self.args.latency_min, self.args.latency_max))
+
+        bucket = self._bucket_for(request)
+        interaction_route = "/interactions/" in request.path
+        if not interaction_route:
+            allowed, _, reset_after = self.global_bucket.take()
+            if not allowed:
+                return self._too_many_requests(reset_after, "global")
+
+        headers = {}
+        if bucket is not None:
+            allowed, remaining, reset_after = bucket.take()
+            if not allowed:
+                return self._too_many_requests(reset_after, "user", bucket)
+            headers = {
+                "X-RateLimit-Limit": str(bucket.limit),
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+                "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                "X-RateLimit-Bucket": bucket.name
+            }
+
+        if not interaction_route and self.rng.random() < self.args.inject_429:
+            return self._too_many_requests(self.rng.uniform(0.1, 1.0), "shared", bucket)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    def _bucket_for(self, request):
+        """Get the rate limit bucket of a request (None if unlimited)"""
+        path = request.path
+        if path.endswith("/messages") and "/channels/" in path:
+            kind, key = "channel_messages", request.match_info.get("channel")
+        elif "/channels/" in path and request.method == "PATCH":
+            kind, key = "message_edits", request.match_info.get("channel")
+        elif path.endswith("/users/@me/channels"):
+            kind, key = "dm_open", None
+        elif "/users/" in path:
+            kind, key = "users", None
+        elif "/commands" in path:
+            kind, key = "commands", None
+        elif "/webhooks/" in path:
+            kind, key = "webhook", request.match_info.get("token")
+        else:
+            return None
+
+        name = f"{kind}:{key}" if key else kind
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            limit, per = self.ROUTE_LIMITS[kind]
+            bucket = self.buckets[name] = RateLimitBucket(name, limit, per)
+        return bucket
+
+    def _too_many_requests(self, retry_after, scope, bucket=None):
+        """Build a 429 response like Discord's"""
+        self.rate_limited[scope] += 1
+        headers = {
+            "Retry-After": str(max(1, round(retry_after))),
+            "X-RateLimit-Scope": scope
+        }
+        if scope == "global":
+            headers["X-RateLimit-Global"] = "true"
+        if bucket is not None:
+            headers.update({
+                "X-RateLimit-Limit": str(bucket.limit),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset-After": f"{retry_after:.3f}",
+                "X-RateLimit-Bucket": bucket.name
+            })
+        body = {"message": "You are being rate limited.", "retry_after": round(retry_after, 3), "global": scope == "global"}
+        return json_response(body, status=429, headers=headers)
+
+    # Gateway
+
+    async def handle_gateway(self, request):
+        """Gateway websocket: HELLO, IDENTIFY/RESUME, heartbeats and dispatches"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connection = GatewayConnection(ws)
+        await ws.send_json({"op": 10, "d": {"heartbeat_interval": 41250}, "s": None, "t": None})
+
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(message.data)
+                op = payload.get("op")
+                if op == 1:
+                    await ws.send_json({"op": 11})
+                elif op == 2:
+                    self.sockets.add(connection)
+                    await self._dispatch(connection, "READY", {
+                        "v": 10,
+                        "user": self.bot_user,
+                        "guilds": [],
+                        "private_channels": [],
+                        "session_id": f"standin-{self.snowflakes.next()}",
+                        "resume_gateway_url": f"ws://{request.host}/gateway",
+                        "application": {"id": str(self.application_id), "flags": 0}
+                    })
+                    self.stats["identifies"] += 1
+                    self._start_load()
+                elif op == 6:
+                    self.sockets.add(connection)
+                    await self._dispatch(connection, "RESUMED", {})
+                    self.stats["resumes"] += 1
+        finally:
+            self.sockets.discard(connection)
+        return ws
+
+    async def _dispatch(self, connection, event, data):
+        """Send a DISPATCH event on one gateway connection"""
+        connection.sequence += 1
+        await connection.ws.send_json({"op": 0, "t": event, "s": connection.sequence, "d": data})
+
+    def _connection(self):
+        """Pick a live gateway connection"""
+        for connection in self.sockets:
+            if not connection.ws.closed:
+                return connection
+        return None
+
+    # Load generator
+
+    def _start_load(self):
+        """Start generating interactions once the bot is connected"""
+        if self.load_task is None:
+            self.started_at = time.monotonic()
+            self.load_task = asyncio.create_task(self._generate_load())
+
+    async def _generate_load(self):
+        """Dispatch interactions at the configured rate for the configured duration"""
+        interval = 1 / self.args.rate
+        deadline = time.monotonic() + self.args.duration
+        next_at = time.monotonic()
+        tokens = ["BTC", "ETH", "LTC", "XRP", "SOL", "DOGE", "BCH", "XMR", "TRX"]
+
+        while time.monotonic() < deadline:
+            next_at += interval
+            connection = self._connection()
+            if connection is not None:
+                user_id = self.rng.choice(self.users)
+                roll = self.rng.random()
+                known = self.swap_ids.get(user_id)
+                if roll < self.args.status_share and known:
+                    await self._send_interaction(connection, user_id, "status", [
+                        {"name": "swap_id", "type": 3, "value": self.rng.choice(known)}
+                    ])
+                elif roll < self.args.status_share + 0.05:
+                    await self._send_interaction(connection, user_id, "supported_tokens", [])
+                else:
+                    from_currency, to_currency = self.rng.sample(tokens, 2)
+                    await self._send_interaction(connection, user_id, "swap", [
+                        {"name": "usd_amount", "type": 10, "value": round(self.rng.uniform(10, 1000), 2)},
+                        {"name": "from_currency", "type": 3, "value": from_currency},
+                        {"name": "to_currency", "type": 3, "value": to_currency}
+                    ])
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+        log.info("Load finished")
+
+    async def _send_interaction(self, connection, user_id, command, options):
+        """Dispatch one slash command interaction"""
+        interaction_id = self.snowflakes.next()
+        token = f"tok{interaction_id}"
+        pending = PendingInteraction(interaction_id, token, command, user_id)
+        self.interactions[interaction_id] = pending
+        self.interactions_by_token[token] = pending
+        self.stats["interactions"] += 1
+        self.stats[f"interactions:{command}"] += 1
+
+        channel_id = self._dm_channel_id(user_id)
+        await self._dispatch(connection, "INTERACTION_CREATE", {
+            "id": str(interaction_id),
+            "application_id": str(self.application_id),
+            "type": 2,
+            "data": {
+                "id": str(self.commands.get(command, {}).get("id", self.snowflakes.next())),
+                "name": command,
+                "type": 1,
+                "options": options
+            },
+            "channel_id": str(channel_id),
+            "channel": {"id": str(channel_id), "type": 1},
+            "user": self._user_payload(user_id),
+            "token": token,
+            "version": 1,
+            "locale": "en-US",
+            "app_permissions": "0",
+            "attachment_size_limit": 8388608,
+            "entitlements": [],
+            "authorizing_integration_owners": {"1": str(user_id)},
+            "context": 1
+        })
+
+    # REST handlers
+
+    async def handle_gateway_url(self, request):
+        return json_response({
+            "url": f"ws://{request.host}/gateway",
+            "shards": 1,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1}
+        })
+
+    async def handle_me(self, request):
+        return json_response(self.bot_user)
+
+    async def handle_application(self, request):
+        return json_response({
+            "id": str(self.application_id),
+            "name": "CoinKong",
+            "icon": None,
+            "description": "",
+            "bot_public": True,
+            "bot_require_code_grant": False,
+            "owner": self._user_payload(OWNER_ID),
+            "verify_key": "0" * 64,
+            "flags": 0
+        })
+
+    async def handle_sync(self, request):
+        """Bulk-overwrite the global commands (tree.sync)"""
+        self.stats["commandSyncs"] += 1
+        commands = await request.json()
+        self.commands = {}
+        for command in commands:
+            command = {
+                **command,
+                "id": str(self.snowflakes.next()),
+                "application_id": str(self.application_id),
+                "version": str(self.snowflakes.next()),
+                "type": command.get("type", 1)
+            }
+            self.commands[command["name"]] = command
+        return json_response(list(self.commands.values()))
+
+    async def handle_list_commands(self, request):
+        return json_response(list(self.commands.values()))
+
+    async def handle_callback(self, request):
+        """Acknowledge an interaction (send_message or defer)"""
+        pending = self.interactions.get(int(request.match_info["id"]))
+        if pending is None or pending.acked_at is not None:
+            return self._unknown_interaction()
+
+        now = time.monotonic()
+        if now - pending.dispatched_at > INTERACTION_TIMEOUT:
+            # Too late: Discord has already shown the user an error
+            pending.failed = True
+            self.stats["expiredInteractions"] += 1
+            return self._unknown_interaction()
+
+        body = await request.json()
+        pending.acked_at = now
+        pending.ack_type = body["type"]
+        self.ack_latencies.append(now - pending.dispatched_at)
+
+        message = None
+        if body["type"] == 4:
+            data = body.get("data", {})
+            message = self._message_payload(self._dm_channel_id(pending.user_id), data, webhook=True)
+            self._record_response(pending, data)
+
+        return json_response({
+            "interaction": {
+                "id": str(pending.id),
+                "type": 2,
+                "response_message_id": message["id"] if message else None,
+                "response_message_loading": body["type"] == 5,
+                "response_message_ephemeral": bool(body.get("data", {}).get("flags", 0) & 64)
+            },
+            "resource": {"type": body["type"], "message": message} if message else {"type": body["type"]}
+        })
+
+    async def handle_followup(self, request):
+        """Send a followup message through the interaction webhook"""
+        pending = self.interactions_by_token.get(request.match_info["token"])
+        if pending is None:
+            return self._unknown_interaction()
+        data = await request.json()
+        self._record_response(pending, data)
+        self.stats["followups"] += 1
+        return json_response(self._message_payload(self._dm_channel_id(pending.user_id), data, webhook=True))
+
+    async def handle_webhook_message(self, request):
+        """Get or edit the original interaction response"""
+        pending = self.interactions_by_token.get(request.match_info["token"])
+        if pending is None:
+            return self._unknown_interaction()
+        data = await request.json() if request.method == "PATCH" else {}
+        if request.method == "PATCH":
+            self._record_response(pending, data)
+        return json_response(self._message_payload(self._dm_channel_id(pending.user_id), data, webhook=True))
+
+    async def handle_user(self, request):
+        """fetch_user"""
+        self.stats["userFetches"] += 1
+        return json_response(self._user_payload(int(request.match_info["user"])))
+
+    async def handle_open_dm(self, request):
+        """Open a DM channel with a user"""
+        body = await request.json()
+        user_id = int(body["recipient_id"])
+        self.stats["dmOpens"] += 1
+        return json_response({
+            "id": str(self._dm_channel_id(user_id)),
+            "type": 1,
+            "last_message_id": None,
+            "recipients": [self._user_payload(user_id)]
+        })
+
+    async def handle_channel_message(self, request):
+        """Send a message to a channel (DMs)"""
+        data = await request.json()
+        self.stats["dmMessages"] += 1
+        self.stats["dmEmbeds"] += len(data.get("embeds") or [])
+        return json_response(self._message_payload(int(request.match_info["channel"]), data))
+
+    async def handle_edit_message(self, request):
+        """Edit a message (live status messages)"""
+        data = await request.json()
+        self.stats["messageEdits"] += 1
+        return json_response(self._message_payload(
+            int(request.match_info["channel"]), data, message_id=int(request.match_info["message"])
+        ))
+
+    async def handle_stats(self, request):
+        return json_response(self.report())
+
+    # Helpers
+
+    def _record_response(self, pending, data):
+        """Note the first visible response to an interaction and remember created swap IDs"""
+        embeds = data.get("embeds") or []
+        if pending.responded_at is None:
+            pending.responded_at = time.monotonic()
+            self.response_latencies.append(pending.responded_at - pending.dispatched_at)
+            title = embeds[0].get("title", "") if embeds else ""
+            if title.startswith(ERROR_TITLES):
+                pending.failed = True
+                self.stats[f"errors:{pending.command}"] += 1
+
+        for embed in embeds:
+            for field in embed.get("fields", []):
+                if field.get("name") == "💼 Swap ID":
+                    known = self.swap_ids.setdefault(pending.user_id, [])
+                    if field["value"] not in known:
+                        known.append(field["value"])
+                        del known[:-20]
+
+    def _dm_channel_id(self, user_id):
+        """Get the (stable) DM channel ID for a user"""
+        channel_id = self.dm_channels.get(user_id)
+        if channel_id is None:
+            channel_id = self.dm_channels[user_id] = self.snowflakes.next()
+        return channel_id
+
+    def _user_payload(self, user_id, name=None, bot=False):
+        return {
+            "id": str(user_id),
+            "username": name or f"user{user_id}",
+            "discriminator": "0",
+            "global_name": None,
+            "avatar": None,
+            "bot": bot
+        }
+
+    def _message_payload(self, channel_id, data, webhook=False, message_id=None):
+        message = {
+            "id": str(message_id or self.snowflakes.next()),
+            "channel_id": str(channel_id),
+            "author": self.bot_user,
+            "content": data.get("content") or "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": data.get("embeds") or [],
+            "pinned": False,
+            "type": 0,
+            "flags": data.get("flags", 0)
+        }
+        if webhook:
+            message["webhook_id"] = str(self.application_id)
+            message["application_id"] = str(self.application_id)
+        return message
+
+    def _unknown_interaction(self):
+        self.stats["unknownInteractions"] += 1
+        return json_response({"message": "Unknown interaction", "code": 10062}, status=404)
+
+    def report(self):
+        """Summarize what the bot did under load"""
+        def summary(values):
+            values = sorted(values)
+            if not values:
+                return None
+            pick = lambda fraction: round(values[min(len(values) - 1, int(fraction * len(values)))] * 1000, 1)
+            return {"count": len(values), "p50Ms": pick(0.5), "p90Ms": pick(0.9), "p99Ms": pick(0.99), "maxMs": round(values[-1] * 1000, 1)}
+
+        # Interactions never acknowledged within the deadline count as expired too
+        now = time.monotonic()
+        unanswered = sum(
+            1 for pending in self.interactions.values()
+            if pending.acked_at is None and not pending.failed and now - pending.dispatched_at > INTERACTION_TIMEOUT
+        )
+        return {
+            "elapsedSeconds": round(now - self.started_at, 1) if self.started_at else 0,
+            "parameters": vars(self.args),
+            "counts": dict(self.stats),
+            "unansweredInteractions": unanswered,
+            "rateLimited": dict(self.rate_limited),
+            "ackLatency": summary(self.ack_latencies),
+            "responseLatency": summary(self.response_latencies)
+        }
+
+    async def report_periodically(self):
+        """Log a summary every report interval"""
+        while True:
+            await asyncio.sleep(self.args.report_interval)
+            log.info(json.dumps(self.report(), ensure_ascii=False))
+
+def json_response(body, status=200, headers=None):
+    """JSON response with the exact content type discord.py expects (no charset)"""
+    return web.Response(
+        body=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+        status=status,
+        headers={"Content-Type": "application/json", **(headers or {})}
+    )
+
+async def serve(args):
+    """Run the stand-in until the load has finished plus a grace period, then report"""
+    standin = DiscordStandIn(args)
+    runner = web.AppRunner(standin.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    log.info("Discord stand-in listening on http://%s:%d (gateway ws://%s:%d/gateway)", args.host, args.port, args.host, args.port)
+
+    reporter = asyncio.create_task(standin.report_periodically())
+    try:
+        while standin.load_task is None or not standin.load_task.done():
+            await asyncio.sleep(0.5)
+        # Let swaps that are still running finish and notify their users
+        await asyncio.sleep(args.grace)
+    finally:
+        reporter.cancel()
+        report = standin.report()
+        await runner.cleanup()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Discord gateway/REST stand-in for load and soak tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=10, help="interactions dispatched per second")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load to generate")
+    parser.add_argument("--grace", type=float, default=30, help="seconds to keep serving after the load ends")
+    parser.add_argument("--users", type=int, default=500, help="number of distinct fake users")
+    parser.add_argument("--status-share", type=float, default=0.25, help="fraction of interactions that are /status")
+    parser.add_argument("--latency-min", type=float, default=0.02, help="minimum injected REST latency in seconds")
+    parser.add_argument("--latency-max", type=float, default=0.15, help="maximum injected REST latency in seconds")
+    parser.add_argument("--global-limit", type=int, default=50, help="global REST requests allowed per second")
+    parser.add_argument("--inject-429", type=float, default=0.01, help="probability of an extra 429 on any REST call")
+    parser.add_argument("--report-interval", type=float, default=60, help="seconds between logged summaries")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the final report as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(serve(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import discord
+
+# Footer shared by every embed the bot sends
+FOOTER = {
+    "text": "🦍 CoinKong Bot | Crypto Swaps Made Simple",
+    "icon_url": "https://cdn.discordapp.com/attachments/1179286008138305617/1191166853750788096/bot_profile_pic.png?ex=65a84c40&is=6595d740&hm=76ce5d4e6cb775a9db3d5e0935b87e97d7a8fc873ac3d37dc5c7c9a001a12f36&"
+}
+
+class PrebuiltEmbed(discord.Embed):
+    """Embed whose payload is built once; each send only stamps the current time.
+
+    Treat it as read-only: changes made after construction are not reflected in
+    the payload sent to Discord.
+    """
+
+    __slots__ = ("_payload",)
+
+    @classmethod
+    def from_payload(cls, payload):
+        """Create an embed from a ready-to-send payload dict"""
+        embed = cls.from_dict(payload)
+        embed._payload = payload
+        return embed
+
+    def to_dict(self):
+        return {**self._payload, "timestamp": discord.utils.utcnow().isoformat()}
+
+class EmbedTemplate:
+    """Embed layout compiled once and filled with str.format fields on each render"""
+
+    def __init__(self, title, description, fields, color):
+        self.title = title
+        self.description = description
+        self.fields = [(name, value) for name, value in fields]
+        self.color = color
+
+    def render(self, color=None, **values):
+        """Fill the template with values and return a ready-to-send embed"""
+        payload = {
+            "type": "rich",
+            "title": self.title.format_map(values),
+            "description": self.description.format_map(values),
+            "color": self.color if color is None else color,
+            "footer": FOOTER,
+            "fields": [
+                {"name": name, "value": value.format_map(values), "inline": False}
+                for name, value in self.fields
+            ]
+        }
+        return PrebuiltEmbed.from_payload(payload)
+
+class EmbedTemplates:
+    """Cache of static embeds built once and rebuilt only after a config change"""
+
+    def __init__(self):
+        # name -> function building the embed from the current config
+        self.builders = {}
+        self.static = {}
+
+    def register(self, name, builder):
+        """Register the builder for a static embed"""
+        self.builders[name] = builder
+        self.static.pop(name, None)
+
+    def get(self, name):
+        """Get a static embed, building it on first use"""
+        embed = self.static.get(name)
+        if embed is None:
+            payload = self.builders[name]().to_dict()
+            payload.pop("timestamp", None)
+            embed = PrebuiltEmbed.from_payload(payload)
+            self.static[name] = embed
+        return embed
+
+    def build_all(self):
+        """Build every registered static embed up front"""
+        for name in self.builders:
+            self.get(name)
+
+    def invalidate(self):
+        """Rebuild every static embed (call after changing config)"""
+        self.static.clear()
+        self.build_all()
@@ -0,0 +1,172 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+class SwapJournal:
+    """Append-only journal of swap state transitions with batched fsync and snapshots.
+
+    Every transition appends the full swap record as one JSON line to the current
+    journal segment. Lines are flushed and fsynced in batches by a background task
+    (group commit) rather than once per write. Periodically the open swaps are
+    written to a snapshot and older segments are deleted, so recovery only reads
+    the snapshot plus the segments written since, and its cost tracks the number
+    of open swaps rather than the whole history.
+    """
+
+    def __init__(self, directory, flush_interval, flush_batch, snapshot_interval):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.snapshot_interval = snapshot_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.segment = self._latest_segment() + 1
+        self.file = open(self._segment_path(self.segment), "a", encoding="utf-8")
+        self.pending = 0
+
+        # Held while fsyncing or rotating segments, so a flush never syncs a file
+        # a snapshot is closing
+        self.lock = asyncio.Lock()
+
+        # Callable returning the swaps that are still open, used for snapshots
+        self.get_open_swaps = None
+
+        self.flush_needed = None
+        self.task = None
+
+    def recover(self):
+        """Replay the latest snapshot and journal segments.
+
+        Returns {swap_id: latest record, as written by SwapRecord.dump()} for every
+        swap in the snapshot or written to the journal since it was taken.
+        """
+        swaps = {}
+        first_segment = 0
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            first_segment = snapshot["segment"]
+            for swap in snapshot["swaps"]:
+                swaps[swap["id"]] = swap
+
+        for segment in self._segments():
+            if segment < first_segment or segment == self.segment:
+                continue
+            with open(self._segment_path(segment), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        swap = json.loads(line)
+                    except ValueError:
+                        # A torn write at the end of a segment after a crash
+                        break
+                    swaps[swap["id"]] = swap
+
+        return swaps
+
+    def append(self, swap_record):
+        """Append the current state of a swap"""
+        self.file.write(json.dumps(swap_record.dump()) + "\n")
+        self.pending += 1
+        if self.flush_needed is not None and self.pending >= self.flush_batch:
+            self.flush_needed.set()
+
+    def start(self, get_open_swaps):
+        """Start the background flush and snapshot task"""
+        self.get_open_swaps = get_open_swaps
+        if self.task is None:
+            self.flush_needed = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush outstanding entries and stop the background task"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
+        self.file.close()
+
+    async def flush(self):
+        """Write buffered entries and fsync them off the event loop"""
+        async with self.lock:
+            if self.pending == 0:
+                return
+            self.pending = 0
+            self.file.flush()
+            await asyncio.to_thread(os.fsync, self.file.fileno())
+
+    async def snapshot(self):
+        """Snapshot the open swaps and drop the journal segments it covers"""
+        async with self.lock:
+            # Switch segments first so later transitions land after the snapshot
+            old_file = self.file
+            self.segment += 1
+            self.file = open(self._segment_path(self.segment), "a", encoding="utf-8")
+            open_swaps = [swap.dump() for swap in self.get_open_swaps()]
+
+            old_file.flush()
+            await asyncio.to_thread(os.fsync, old_file.fileno())
+            old_file.close()
+
+            data = json.dumps({"segment": self.segment, "createdAt": int(time.time()), "swaps": open_swaps})
+            await asyncio.to_thread(self._write_snapshot, data)
+
+            for segment in self._segments():
+                if segment < self.segment:
+                    os.remove(self._segment_path(segment))
+
+    async def _run(self):
+        """Flush in batches and take periodic snapshots"""
+        loop = asyncio.get_running_loop()
+
+        # Snapshot right away so segments replayed at startup are compacted
+        next_snapshot = loop.time()
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_needed.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_needed.clear()
+
+            try:
+                await self.flush()
+                if loop.time() >= next_snapshot:
+                    await self.snapshot()
+                    next_snapshot = loop.time() + self.snapshot_interval
+            except Exception as e:
+                log.error("Swap journal error: %s", e)
+
+    def _write_snapshot(self, data):
+        """Atomically replace the snapshot file"""
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _segment_path(self, segment):
+        """Get the file path of a journal segment"""
+        return os.path.join(self.directory, f"journal-{segment:08d}.log")
+
+    def _segments(self):
+        """Get the numbers of all journal segments on disk, oldest first"""
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, "journal-*.log")):
+            try:
+                segments.append(int(os.path.basename(path)[8:-4]))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    def _latest_segment(self):
+        """Get the number of the newest journal segment on disk (0 if none)"""
+        segments = self._segments()
+        return segments[-1] if segments else 0
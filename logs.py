@@ -0,0 +1,158 @@
+import atexit
+import contextlib
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from config import config
+
+# Context attached to every log record emitted while it is set
+swap_id_var = contextvars.ContextVar("swap_id", default=None)
+user_id_var = contextvars.ContextVar("user_id", default=None)
+
+# Formats tracebacks on the calling side, before the record crosses threads
+_plain_formatter = logging.Formatter()
+
+@contextlib.contextmanager
+def log_context(swap_id=None, user_id=None):
+    """Attach a swap and user to the records logged inside the block"""
+    swap_token = swap_id_var.set(swap_id)
+    user_token = user_id_var.set(user_id)
+    try:
+        yield
+    finally:
+        swap_id_var.reset(swap_token)
+        user_id_var.reset(user_token)
+
+def set_log_context(swap_id=None, user_id=None):
+    """Attach a swap and/or user to the records logged from now on in this context"""
+    if swap_id is not None:
+        swap_id_var.set(swap_id)
+    if user_id is not None:
+        user_id_var.set(str(user_id))
+
+class ContextFilter(logging.Filter):
+    """Copy the swap and user context onto each record"""
+
+    def filter(self, record):
+        record.swap_id = swap_id_var.get()
+        record.user_id = user_id_var.get()
+        return True
+
+class BurstSampler(logging.Filter):
+    """Caps the records each logger emits per second below WARNING.
+
+    The first `per_second` records in every one-second window pass; after that
+    only one in `sample_every` does. Warnings and errors are never sampled.
+    """
+
+    def __init__(self, per_second, sample_every):
+        super().__init__()
+        self.per_second = per_second
+        self.sample_every = sample_every
+
+        # logger name -> [window, records seen in it]
+        self.windows = {}
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        window = int(time.monotonic())
+        state = self.windows.get(record.name)
+        if state is None or state[0] != window:
+            state = self.windows[record.name] = [window, 0]
+        state[1] += 1
+
+        over = state[1] - self.per_second
+        if over <= 0 or over % self.sample_every == 0:
+            return True
+        self.sampled_out += 1
+        return False
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Merge the message arguments here but leave JSON encoding to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _plain_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        swap_id = getattr(record, "swap_id", None)
+        if swap_id is not None:
+            entry["swapId"] = swap_id
+        user_id = getattr(record, "user_id", None)
+        if user_id is not None:
+            entry["userId"] = user_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+_handler = None
+_sampler = None
+_listener = None
+
+def setup_logging():
+    """Route all logging through a bounded queue to a JSON writer on a background thread"""
+    global _handler, _sampler, _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.Queue(config["logQueueSize"])
+    _sampler = BurstSampler(config["logSamplePerSecond"], config["logSampleEvery"])
+    _handler = DroppingQueueHandler(log_queue)
+    _handler.addFilter(_sampler)
+    _handler.addFilter(ContextFilter())
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(config["logLevel"])
+    for name, level in config["logLevels"].items():
+        logging.getLogger(name).setLevel(level)
+
+def get_log_stats():
+    """Get the number of records sampled out or dropped because the queue was full"""
+    return {
+        "sampledOut": _sampler.sampled_out if _sampler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0
+    }
@@ -0,0 +1,253 @@
+import bisect
+import logging
+from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from a fast cache hit to a slow DEX call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Metric:
+    """Base class for a metric family with a fixed set of label names"""
+
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+
+        # label values -> child holding the value(s)
+        self.children = {}
+
+    def labels(self, *values):
+        """Get the child for a set of label values (cache it to skip this lookup)"""
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._new_child()
+        return child
+
+    def render(self):
+        """Render the family in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            lines.extend(self._render_child(self._format_labels(values), child))
+        return lines
+
+    def _format_labels(self, values, extra=None):
+        """Format label names and values as {a="x",b="y"}"""
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.label_names, values)]
+        if extra is not None:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class CounterValue:
+    """A single monotonically increasing value"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class Counter(Metric):
+    """Counts events"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterValue()
+
+    def inc(self, *values, amount=1):
+        """Increment the counter for a set of label values"""
+        self.labels(*values).value += amount
+
+    def _render_child(self, labels, child):
+        return [f"{self.name}{labels} {child.value}"]
+
+class GaugeValue:
+    """A single value that can go up and down"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+class Gauge(Metric):
+    """Reports a current value"""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return GaugeValue()
+
+    def set(self, *values, value):
+        """Set the gauge for a set of label values"""
+        self.labels(*values).value = value
+
+    def _render_child(self, labels, child):
+        return [f"{self.name}{labels} {child.value}"]
+
+class HistogramValue:
+    """Bucket counts, sum and count of the observations for one set of labels"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram(Metric):
+    """Distribution of observed values, e.g. latencies in seconds.
+
+    Observing costs one binary search over the bucket bounds and three
+    increments; the buckets are only made cumulative when scraped.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return HistogramValue(self.bounds)
+
+    def observe(self, *values, value):
+        """Record an observation for a set of label values"""
+        self.labels(*values).observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = self._format_labels(values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = self._format_labels(values)
+            lines.append(f"{self.name}_sum{labels} {child.sum}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    """Every metric the bot exports, plus collectors that refresh gauges at scrape time"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, description, labels=()):
+        """Create and register a counter"""
+        return self._add(Counter(name, description, labels))
+
+    def gauge(self, name, description, labels=()):
+        """Create and register a gauge"""
+        return self._add(Gauge(name, description, labels))
+
+    def histogram(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        """Create and register a histogram"""
+        return self._add(Histogram(name, description, labels, buckets))
+
+    def add_collector(self, collector):
+        """Call `collector()` before every scrape, e.g. to set gauges from live state"""
+        self.collectors.append(collector)
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                log.error("Metrics collector failed: %s", e)
+
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+class MetricsServer:
+    """Serves the registry at /metrics on the bot's event loop"""
+
+    def __init__(self, registry, host, port):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.runner = None
+
+    async def start(self):
+        """Start listening"""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        log.info("Serving metrics on http://%s:%d/metrics", self.host, self.port)
+
+    async def stop(self):
+        """Stop listening"""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_metrics(self, request):
+        """Render the current metrics"""
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+def _escape(value):
+    """Escape a label value"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# The bot's metrics
+registry = MetricsRegistry()
+
+command_latency = registry.histogram(
+    "coinkong_command_duration_seconds", "Time to run a slash command", ("command", "outcome"))
+command_ack_latency = registry.histogram(
+    "coinkong_command_ack_seconds", "Time from receiving a slash command to acknowledging it", ("command",))
+stage_latency = registry.histogram(
+    "coinkong_swap_stage_duration_seconds", "Time to run a swap stage", ("stage", "outcome"))
+swap_transitions = registry.counter(
+    "coinkong_swap_transitions_total", "Swaps moved into each status", ("status",))
+swaps_rejected = registry.counter(
+    "coinkong_swaps_rejected_total", "New swaps turned away by rate limits or load shedding", ("reason",))
+swaps_open = registry.gauge(
+    "coinkong_swaps_open", "Swaps currently in each open status", ("status",))
+dex_latency = registry.histogram(
+    "coinkong_dex_call_duration_seconds", "Time per DEX call", ("dex", "call", "outcome"))
+dm_latency = registry.histogram(
+    "coinkong_dm_send_duration_seconds", "Time to deliver a DM, including retries", ("outcome",))
+dm_retries = registry.counter(
+    "coinkong_dm_retries_total", "DM send attempts that were retried", ("reason",))
+scheduler_jobs = registry.gauge(
+    "coinkong_scheduler_jobs", "Swap scheduler queue depths", ("queue",))
+price_age = registry.gauge(
+    "coinkong_price_age_seconds", "Seconds since each token's last USD price tick", ("token",))
+price_version = registry.gauge(
+    "coinkong_price_snapshot_version", "Version of the latest published USD price snapshot")
+outbox_messages = registry.gauge(
+    "coinkong_dm_outbox_messages", "Notifications waiting in the DM outbox")
+
+# Totals kept by other components, copied in at scrape time
+quote_cache_requests = registry.counter(
+    "coinkong_quote_cache_requests_total", "Quote cache lookups by result", ("result",))
+log_records_lost = registry.counter(
+    "coinkong_log_records_lost_total", "Log records sampled out or dropped", ("reason",))
@@ -0,0 +1,373 @@
+import asyncio
+import itertools
+import json
+import logging
+import random
+import sqlite3
+import time
+from collections import OrderedDict, deque
+import discord
+from config import config
+from logs import log_context
+from metrics import dm_latency, dm_retries
+
+log = logging.getLogger(__name__)
+
+# Discord allows at most this many embeds in one message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+class UserCache:
+    """LRU cache with a TTL for resolved users and their DM channels"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # user_id -> (DM channel, cached_at)
+        self.entries = OrderedDict()
+
+    def get(self, user_id):
+        """Get a cached DM channel (None if missing or expired)"""
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        channel, cached_at = entry
+        if time.monotonic() - cached_at > self.ttl:
+            del self.entries[user_id]
+            return None
+        self.entries.move_to_end(user_id)
+        return channel
+
+    def put(self, user_id, channel):
+        """Cache a DM channel"""
+        self.entries[user_id] = (channel, time.monotonic())
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Forget a user's DM channel"""
+        self.entries.pop(user_id, None)
+
+class Notifier:
+    """Persistent outbox for direct messages, plus live-updating status messages.
+
+    Notifications are written to a SQLite outbox and delivered by a small pool of
+    senders, one user at a time so each user's messages stay in order. DM channels
+    are cached so most sends skip the fetch_user REST call. Status updates queued
+    back-to-back for the same user are coalesced: only the latest update per swap
+    is kept and the rest are sent together as one multi-embed message. Failed sends
+    are retried with exponential backoff and jitter, honouring rate limits. Live
+    status updates are kept in the same database, one row per key holding the
+    latest update, so a restart inside the debounce window still makes the edit.
+    """
+
+    def __init__(self, bot, path=None):
+        self.bot = bot
+        self.user_cache = UserCache(config["dmCacheSize"], config["dmCacheTTL"])
+        self.max_attempts = config["dmMaxAttempts"]
+        self.sender_count = config["dmSenders"]
+
+        self.conn = sqlite3.connect(path or config["notificationOutboxPath"])
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                userId TEXT NOT NULL,
+                coalesceKey TEXT,
+                payload TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS live_outbox (
+                key TEXT PRIMARY KEY,
+                userId TEXT NOT NULL,
+                messageId INTEGER,
+                revision INTEGER NOT NULL,
+                payload TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+        # user_id -> deque of (outbox id, coalesce key, payload)
+        self.queues = {}
+
+        # Live status messages: key -> pending update, and keys with an edit in flight
+        self.live_debounce = config["liveEditDebounce"]
+        self.live_pending = {}
+        self.live_sending = set()
+        self.live_tasks = set()
+        last_revision = self.conn.execute("SELECT MAX(revision) FROM live_outbox").fetchone()[0]
+        self.live_revisions = itertools.count((last_revision or 0) + 1)
+
+        # Users with queued messages that no sender has picked up yet
+        self.ready = None
+        self.ready_users = set()
+        self.tasks = []
+
+        # Reload notifications that were not delivered before the last shutdown; restored
+        # live updates wait for resume_live() so their owner can re-attach callbacks first
+        self.live_restored = []
+        for row_id, user_id, key, payload in self.conn.execute("SELECT id, userId, coalesceKey, payload FROM outbox ORDER BY id"):
+            self.queues.setdefault(user_id, deque()).append((row_id, key, json.loads(payload)))
+        for key, user_id, message_id, revision, payload in self.conn.execute(
+                "SELECT key, userId, messageId, revision, payload FROM live_outbox"):
+            self.live_pending[key] = {
+                "userId": user_id,
+                "embed": discord.Embed.from_dict(json.loads(payload)),
+                "messageId": message_id,
+                "onMessage": None,
+                "revision": revision
+            }
+            self.live_restored.append(key)
+
+    def start(self):
+        """Start the sender pool on the running loop"""
+        if self.tasks:
+            return
+        self.ready = asyncio.Queue()
+        for user_id in self.queues:
+            self._mark_ready(user_id)
+        for _ in range(self.sender_count):
+            self.tasks.append(asyncio.create_task(self._run_sender()))
+
+    def resume_live(self, callback_for):
+        """Start sending the live updates restored at startup, giving each the
+        `on_message` callback returned by `callback_for(key)` (None for no callback)"""
+        restored, self.live_restored = self.live_restored, []
+        for key in restored:
+            entry = self.live_pending.get(key)
+            if entry is None:
+                continue
+            entry["onMessage"] = entry["onMessage"] or callback_for(key)
+            asyncio.get_running_loop().call_soon(self._start_live, key)
+
+    async def stop(self):
+        """Stop the senders; undelivered notifications and live updates stay in the outbox"""
+        for task in self.tasks + list(self.live_tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.conn.close()
+
+    def notify(self, user_id, content=None, embed=None, key=None):
+        """Queue a DM for a user. Updates sharing a `key` (e.g. a swap ID) supersede each other."""
+        user_id = str(user_id)
+        payload = {"content": content, "embed": embed.to_dict() if embed is not None else None}
+        with self.conn:
+            row_id = self.conn.execute(
+                "INSERT INTO outbox (userId, coalesceKey, payload) VALUES (?, ?, ?)",
+                (user_id, key, json.dumps(payload))
+            ).lastrowid
+
+        self.queues.setdefault(user_id, deque()).append((row_id, key, payload))
+        if self.ready is not None:
+            self._mark_ready(user_id)
+
+    def notify_live(self, user_id, key, embed, message_id=None, on_message=None):
+        """Show `embed` in a single live message per `key`, editing it in place.
+
+        The first update sends the message and reports its ID through
+        `on_message(message_id)`; later updates edit it. Updates arriving within
+        the debounce window collapse into one edit showing the latest embed.
+        The latest update per key is stored before this returns.
+        """
+        entry = self.live_pending.get(key)
+        if entry is not None:
+            entry["embed"] = embed
+            entry["messageId"] = entry["messageId"] or message_id
+            entry["onMessage"] = entry["onMessage"] or on_message
+            entry["revision"] = next(self.live_revisions)
+            self._save_live(key, entry)
+            return
+
+        entry = self.live_pending[key] = {
+            "userId": str(user_id),
+            "embed": embed,
+            "messageId": message_id,
+            "onMessage": on_message,
+            "revision": next(self.live_revisions)
+        }
+        self._save_live(key, entry)
+        if key not in self.live_sending:
+            asyncio.get_running_loop().call_later(self.live_debounce, self._start_live, key)
+
+    def get_stats(self):
+        """Get the outbox depth"""
+        return {
+            "queuedUsers": len(self.queues),
+            "queuedMessages": sum(len(queue) for queue in self.queues.values()),
+            "cachedChannels": len(self.user_cache.entries)
+        }
+
+    async def get_dm_channel(self, user_id):
+        """Resolve a user's DM channel, using the cache before any REST call"""
+        channel = self.user_cache.get(user_id)
+        if channel is not None:
+            return channel
+
+        user = self.bot.get_user(int(user_id))
+        if user is None:
+            user = await self.bot.fetch_user(int(user_id))
+        channel = user.dm_channel or await user.create_dm()
+        self.user_cache.put(user_id, channel)
+        return channel
+
+    def _mark_ready(self, user_id):
+        """Hand a user to the senders unless one already has them"""
+        if user_id not in self.ready_users:
+            self.ready_users.add(user_id)
+            self.ready.put_nowait(user_id)
+
+    def _save_live(self, key, entry):
+        """Store the latest live update for a key, replacing any earlier one"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO live_outbox (key, userId, messageId, revision, payload) VALUES (?, ?, ?, ?, ?)",
+                (key, entry["userId"], entry["messageId"], entry["revision"], json.dumps(entry["embed"].to_dict()))
+            )
+
+    async def _run_sender(self):
+        """Deliver queued notifications one user at a time"""
+        while True:
+            user_id = await self.ready.get()
+            try:
+                with log_context(user_id=user_id):
+                    while self.queues.get(user_id):
+                        await self._send_batch(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("Notification sender error for user %s: %s", user_id, e)
+            finally:
+                self.ready_users.discard(user_id)
+                if self.queues.get(user_id):
+                    # New notifications arrived after a failure; try again later
+                    asyncio.get_running_loop().call_later(1, self._mark_ready, user_id)
+                else:
+                    self.queues.pop(user_id, None)
+
+    def _start_live(self, key):
+        """Start sending the pending live update for a key"""
+        task = asyncio.create_task(self._send_live(key))
+        self.live_tasks.add(task)
+        task.add_done_callback(self.live_tasks.discard)
+
+    async def _send_live(self, key):
+        """Send or edit the live message for a key with its latest embed"""
+        entry = self.live_pending.pop(key, None)
+        if entry is None:
+            return
+
+        self.live_sending.add(key)
+        message_id = entry["messageId"]
+        try:
+            async def send(channel):
+                if message_id is not None:
+                    try:
+                        await channel.get_partial_message(message_id).edit(embed=entry["embed"])
+                        return message_id
+                    except discord.NotFound:
+                        # The message was deleted; post a new one
+                        pass
+                message = await channel.send(embed=entry["embed"])
+                return message.id
+
+            sent_id = await self._deliver(entry["userId"], send)
+            with self.conn:
+                if sent_id is not None and sent_id != message_id:
+                    # A newer update still waiting must edit this message
+                    self.conn.execute("UPDATE live_outbox SET messageId = ? WHERE key = ?", (sent_id, key))
+                # Handled, unless a newer update replaced it meanwhile
+                self.conn.execute("DELETE FROM live_outbox WHERE key = ? AND revision = ?", (key, entry["revision"]))
+            if sent_id is not None and sent_id != message_id:
+                message_id = sent_id
+                if entry["onMessage"] is not None:
+                    entry["onMessage"](sent_id)
+        finally:
+            self.live_sending.discard(key)
+
+            # Updates that arrived mid-send reuse the same message
+            next_entry = self.live_pending.get(key)
+            if next_entry is not None:
+                next_entry["messageId"] = next_entry["messageId"] or message_id
+                next_entry["onMessage"] = next_entry["onMessage"] or entry["onMessage"]
+                asyncio.get_running_loop().call_later(self.live_debounce, self._start_live, key)
+
+    async def _send_batch(self, user_id):
+        """Coalesce everything queued for a user into as few messages as possible and send them"""
+        queue = self.queues[user_id]
+        entries = list(queue)
+
+        # Keep only the latest update for each coalesce key
+        latest = {}
+        for index, (_, key, _) in enumerate(entries):
+            if key is not None:
+                latest[key] = index
+        kept = [entry for index, entry in enumerate(entries) if entry[1] is None or latest[entry[1]] == index]
+
+        # Group consecutive embed-only notifications into multi-embed messages
+        messages = []
+        for _, _, payload in kept:
+            last = messages[-1] if messages else None
+            if (payload["content"] is None and payload["embed"] is not None and last is not None
+                    and last["content"] is None and len(last["embeds"]) < MAX_EMBEDS_PER_MESSAGE):
+                last["embeds"].append(payload["embed"])
+            else:
+                messages.append({
+                    "content": payload["content"],
+                    "embeds": [payload["embed"]] if payload["embed"] is not None else []
+                })
+
+        for message in messages:
+            embeds = [discord.Embed.from_dict(embed) for embed in message["embeds"]]
+            await self._deliver(user_id, lambda channel: channel.send(content=message["content"], embeds=embeds))
+
+        # Everything taken from the queue has now been handled
+        row_ids = [entry[0] for entry in entries]
+        for _ in entries:
+            queue.popleft()
+        with self.conn:
+            self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id in row_ids])
+
+    async def _deliver(self, user_id, send):
+        """Run `send(channel)` against a user's DM channel, retrying transient failures
+        with backoff and jitter. Returns its result, or None if delivery failed."""
+        started = time.perf_counter()
+        for attempt in range(self.max_attempts):
+            try:
+                channel = await self.get_dm_channel(user_id)
+                result = await send(channel)
+                dm_latency.observe("sent", value=time.perf_counter() - started)
+                return result
+            except (discord.Forbidden, discord.NotFound) as e:
+                # DMs closed or unknown user: retrying will not help
+                log.warning("Dropping DM to user %s: %s", user_id, e)
+                dm_latency.observe("dropped", value=time.perf_counter() - started)
+                return None
+            except discord.RateLimited as e:
+                reason = "rate_limited"
+                delay = e.retry_after
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    reason = "rate_limited"
+                    delay = float(e.response.headers.get("Retry-After", 1))
+                elif e.status < 500:
+                    log.warning("Dropping DM to user %s: %s", user_id, e)
+                    dm_latency.observe("dropped", value=time.perf_counter() - started)
+                    return None
+                else:
+                    reason = "server_error"
+                    delay = 2 ** attempt
+            except Exception:
+                self.user_cache.invalidate(user_id)
+                reason = "network"
+                delay = 2 ** attempt
+
+            dm_retries.inc(reason)
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+        log.warning("Giving up on DM to user %s after %d attempts", user_id, self.max_attempts)
+        dm_latency.observe("failed", value=time.perf_counter() - started)
+        return None
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from types import MappingProxyType
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+class StalePriceError(Exception):
+    """Raised when a USD price is missing or has not been updated recently enough to quote"""
+
+    def __init__(self, symbols):
+        super().__init__(f"USD price out of date for {', '.join(symbols)}")
+        self.symbols = symbols
+
+class PriceSnapshot:
+    """Immutable set of USD prices published by the feed.
+
+    prices and ticked_at map symbols to the price and the time.monotonic() of
+    its last tick; usd holds the same prices as a read-only array in token
+    order. A new snapshot is built for every change, so a reader holding one
+    always sees a consistent set of prices.
+    """
+
+    __slots__ = ("version", "prices", "ticked_at", "usd")
+
+    def __init__(self, version, prices, ticked_at, tokens):
+        self.version = version
+        self.prices = MappingProxyType(prices)
+        self.ticked_at = MappingProxyType(ticked_at)
+        usd = np.array([prices.get(token, np.nan) for token in tokens], dtype=float)
+        usd.flags.writeable = False
+        self.usd = usd
+
+    def stale_symbols(self, symbols, max_age, now=None):
+        """Get the symbols whose price is missing or older than max_age seconds"""
+        now = time.monotonic() if now is None else now
+        return [symbol for symbol in symbols if now - self.ticked_at.get(symbol, -math.inf) > max_age]
+
+class PriceSource:
+    """Base class for streaming price sources"""
+
+    async def ticks(self):
+        """Yield (symbol, USD price) ticks as they arrive"""
+        raise NotImplementedError
+        yield
+
+class MockPriceSource(PriceSource):
+    """Random walk from a set of starting prices, for local testing"""
+
+    def __init__(self, prices, interval=1.0, volatility=0.001):
+        self.prices = dict(prices)
+        self.interval = interval
+        self.volatility = volatility
+
+    async def ticks(self):
+        while True:
+            for symbol, price in self.prices.items():
+                price *= 1 + random.gauss(0, self.volatility)
+                self.prices[symbol] = price
+                yield symbol, price
+            await asyncio.sleep(self.interval)
+
+class FilePriceSource(PriceSource):
+    """Follows a file of JSON lines like {"symbol": "BTC", "price": 35000}"""
+
+    def __init__(self, path, poll_interval=0.5):
+        self.path = path
+        self.poll_interval = poll_interval
+
+    async def ticks(self):
+        while not os.path.exists(self.path):
+            await asyncio.sleep(self.poll_interval)
+        with open(self.path, "rb") as f:
+            while True:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # Wait for the rest of a partly written line
+                    f.seek(f.tell() - len(line))
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                tick = parse_tick(line)
+                if tick is not None:
+                    yield tick
+
+class TcpPriceSource(PriceSource):
+    """Reads JSON line ticks from a TCP socket, reconnecting when it drops"""
+
+    def __init__(self, host, port, reconnect_delay=1.0):
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+
+    async def ticks(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                log.warning("Price feed connection to %s:%d failed: %s", self.host, self.port, e)
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            try:
+                while line := await reader.readline():
+                    tick = parse_tick(line)
+                    if tick is not None:
+                        yield tick
+            finally:
+                writer.close()
+            log.warning("Price feed connection to %s:%d closed", self.host, self.port)
+            await asyncio.sleep(self.reconnect_delay)
+
+def parse_tick(line):
+    """Parse a JSON line tick into (symbol, price), or None if it is malformed"""
+    try:
+        tick = json.loads(line)
+        return str(tick["symbol"]).upper(), float(tick["price"])
+    except (ValueError, KeyError, TypeError):
+        log.warning("Ignoring malformed price tick: %r", line)
+        return None
+
+def make_price_source(spec, mock_prices, mock_interval=1.0):
+    """Create a price source from "mock", "file:<path>" or "tcp:<host>:<port>\""""
+    kind, _, target = spec.partition(":")
+    if kind == "mock":
+        return MockPriceSource(mock_prices, mock_interval)
+    if kind == "file" and target:
+        return FilePriceSource(target)
+    if kind == "tcp" and target:
+        host, _, port = target.rpartition(":")
+        return TcpPriceSource(host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown price feed source: {spec}")
+
+class PriceFeed:
+    """Ingests streaming USD price ticks and publishes them as snapshots.
+
+    Ticks are collected by a single background task and published at most every
+    `publish_interval` seconds as a new PriceSnapshot with a higher version.
+    Publishing only rebinds `self.snapshot`, so readers take no lock: they read
+    the attribute once and use that snapshot for the whole quote.
+    """
+
+    def __init__(self, tokens, source, max_age, publish_interval, retry_delay=1.0):
+        self.tokens = list(tokens)
+        self.known = set(self.tokens)
+        self.source = source
+        self.max_age = max_age
+        self.publish_interval = publish_interval
+        self.retry_delay = retry_delay
+
+        self.snapshot = PriceSnapshot(0, {}, {}, self.tokens)
+        self.pending = {}
+        self.last_published = -math.inf
+        self.publish_handle = None
+        self.task = None
+
+    def start(self):
+        """Start ingesting ticks"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop ingesting ticks"""
+        if self.publish_handle is not None:
+            self.publish_handle.cancel()
+            self.publish_handle = None
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def fresh_snapshot(self, *symbols):
+        """Get the current snapshot, raising StalePriceError if any of the symbols' prices are stale"""
+        snapshot = self.snapshot
+        stale = snapshot.stale_symbols(symbols, self.max_age)
+        if stale:
+            raise StalePriceError(stale)
+        return snapshot
+
+    def update(self, prices):
+        """Publish several prices ({symbol: USD price}) at once, e.g. to seed the feed"""
+        now = time.monotonic()
+        for symbol, price in prices.items():
+            self.pending[symbol] = (price, now)
+        self.publish()
+
+    def publish(self):
+        """Publish every pending tick as a new snapshot"""
+        if self.publish_handle is not None:
+            self.publish_handle.cancel()
+            self.publish_handle = None
+        if not self.pending:
+            return
+        current = self.snapshot
+        prices = dict(current.prices)
+        ticked_at = dict(current.ticked_at)
+        for symbol, (price, at) in self.pending.items():
+            prices[symbol] = price
+            ticked_at[symbol] = at
+        self.pending = {}
+        self.snapshot = PriceSnapshot(current.version + 1, prices, ticked_at, self.tokens)
+        self.last_published = time.monotonic()
+
+    def _on_tick(self, symbol, price):
+        """Queue a tick and publish now, or as soon as the publish interval allows"""
+        if symbol not in self.known or not price > 0:
+            return
+        now = time.monotonic()
+        self.pending[symbol] = (price, now)
+        wait = self.last_published + self.publish_interval - now
+        if wait <= 0:
+            self.publish()
+        elif self.publish_handle is None:
+            self.publish_handle = asyncio.get_running_loop().call_later(wait, self.publish)
+
+    async def _run(self):
+        while True:
+            try:
+                async for symbol, price in self.source.ticks():
+                    self._on_tick(symbol, price)
+                log.warning("Price feed source ended; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("Price feed source failed: %s", e)
+            await asyncio.sleep(self.retry_delay)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+class QuoteCache:
+    """Per-pair quote cache with TTL, LRU eviction, single-flight misses and stale-while-revalidate.
+
+    A quote younger than its TTL is served as-is. A quote past its TTL but still
+    inside the stale window is served immediately while one background refresh
+    fetches a new one. Concurrent misses for the same pair share a single fetch.
+    """
+
+    def __init__(self, ttl, stale_ttl, max_size, pair_ttls=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.pair_ttls = pair_ttls if pair_ttls is not None else {}
+
+        # pair -> (quote, fetched_at), least recently used first
+        self.entries = OrderedDict()
+
+        # pair -> task currently fetching that pair
+        self.inflight = {}
+
+        # pair -> {"hits", "staleHits", "misses"}
+        self.stats = {}
+
+    def get_ttl(self, pair):
+        """Get the freshness TTL (in seconds) for a pair"""
+        return self.pair_ttls.get(pair, self.ttl)
+
+    async def get(self, pair, fetch):
+        """Get the quote for a pair, calling `fetch()` (a coroutine function) on a miss"""
+        entry = self.entries.get(pair)
+        if entry is not None:
+            quote, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            ttl = self.get_ttl(pair)
+
+            if age < ttl:
+                self._count(pair, "hits")
+                self.entries.move_to_end(pair)
+                return quote
+
+            if age < ttl + self.stale_ttl:
+                # Serve the stale quote and refresh it in the background
+                self._count(pair, "staleHits")
+                self.entries.move_to_end(pair)
+                self._start_fetch(pair, fetch)
+                return quote
+
+        self._count(pair, "misses")
+        return await asyncio.shield(self._start_fetch(pair, fetch))
+
+    def peek(self, pair):
+        """Get the cached quote for a pair while it may still be served (None otherwise), without fetching"""
+        entry = self.entries.get(pair)
+        if entry is None:
+            return None
+        quote, fetched_at = entry
+        if time.monotonic() - fetched_at >= self.get_ttl(pair) + self.stale_ttl:
+            return None
+        return quote
+
+    def invalidate(self, pair=None):
+        """Drop the cached quote for a pair (or every pair)"""
+        if pair is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(pair, None)
+
+    def get_stats(self):
+        """Get hit/miss counters per pair and in total"""
+        total = {"hits": 0, "staleHits": 0, "misses": 0}
+        for counters in self.stats.values():
+            for key, value in counters.items():
+                total[key] += value
+        return {"pairs": {pair: dict(counters) for pair, counters in self.stats.items()}, "total": total}
+
+    def _count(self, pair, key):
+        """Increment a counter for a pair"""
+        counters = self.stats.get(pair)
+        if counters is None:
+            counters = self.stats[pair] = {"hits": 0, "staleHits": 0, "misses": 0}
+        counters[key] += 1
+
+    def _start_fetch(self, pair, fetch):
+        """Start fetching a pair unless a fetch is already in flight, and return its task"""
+        task = self.inflight.get(pair)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(pair, fetch))
+            task.add_done_callback(self._fetch_done)
+            self.inflight[pair] = task
+        return task
+
+    async def _fetch(self, pair, fetch):
+        """Fetch a quote and store it in the cache"""
+        try:
+            quote = await fetch()
+        finally:
+            self.inflight.pop(pair, None)
+
+        self.entries[pair] = (quote, time.monotonic())
+        self.entries.move_to_end(pair)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return quote
+
+    @staticmethod
+    def _fetch_done(task):
+        """Mark failures of background refreshes as retrieved"""
+        if not task.cancelled():
+            task.exception()
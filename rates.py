@@ -0,0 +1,76 @@
+import numpy as np
+
+class RateMatrix:
+    """Dense token x token exchange rate and fee matrices backed by NumPy.
+
+    Tokens are indexed in the order given (the order of config["supportedTokens"]).
+    rates[i, j] is how much of token j one unit of token i buys (NaN when the pair
+    is not quoted) and fees[i, j] is the exchange fee for that pair in percent.
+    USD prices live in the PriceFeed snapshots, not here.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.index = {token: i for i, token in enumerate(self.tokens)}
+
+        n = len(self.tokens)
+        self.rates = np.full((n, n), np.nan)
+        self.fees = np.zeros((n, n))
+
+        # Bumped on every change so derived tables know when to rebuild
+        self.version = 0
+
+    def has_rate(self, from_currency, to_currency):
+        """Check if a pair is quoted directly"""
+        i = self.index.get(from_currency)
+        j = self.index.get(to_currency)
+        return i is not None and j is not None and not np.isnan(self.rates[i, j])
+
+    def set_rates(self, rates):
+        """Set several pairs at once ({(from, to): (rate, fee percent)})"""
+        for (from_currency, to_currency), (rate, fee_percent) in rates.items():
+            i, j = self.index[from_currency], self.index[to_currency]
+            self.rates[i, j] = rate
+            self.fees[i, j] = fee_percent
+        self.version += 1
+
+    def indices(self, symbols):
+        """Convert a sequence of token symbols to an index array"""
+        try:
+            return np.fromiter((self.index[symbol] for symbol in symbols), dtype=np.intp, count=len(symbols))
+        except KeyError as e:
+            raise ValueError(f"Unsupported token: {e.args[0]}")
+
+    def quote_many(self, amounts, from_symbols, to_symbols, platform_fee_percent, rates=None, fees=None, calculate_fee=None):
+        """Quote many (amount, from, to) triples in one vectorized step.
+
+        `rates`/`fees` default to the direct-pair matrices; pass route matrices to
+        quote multi-hop pairs. `calculate_fee(amounts, percents)` overrides the fee
+        formula. Returns a dict of arrays; unquoted pairs have a NaN rate.
+        """
+        rates = self.rates if rates is None else rates
+        fees = self.fees if fees is None else fees
+        if calculate_fee is None:
+            calculate_fee = lambda amount, fee_percentage: amount * (fee_percentage / 100)
+
+        i = self.indices(from_symbols)
+        j = self.indices(to_symbols)
+        amounts = np.asarray(amounts, dtype=float)
+
+        rate = rates[i, j]
+        exchange_fee_percent = fees[i, j]
+        estimated = amounts * rate
+        exchange_fee = calculate_fee(estimated, exchange_fee_percent)
+        platform_fee = calculate_fee(estimated, platform_fee_percent)
+        total_fee = exchange_fee + platform_fee
+
+        return {
+            "rate": rate,
+            "estimatedAmount": estimated,
+            "exchangeFeePercent": exchange_fee_percent,
+            "exchangeFee": exchange_fee,
+            "platformFeePercent": np.full(len(amounts), float(platform_fee_percent)),
+            "platformFee": platform_fee,
+            "totalFee": total_fee,
+            "finalAmount": estimated - total_fee
+        }
@@ -0,0 +1,325 @@
+import sys
+import time
+from collections import OrderedDict
+from config import config
+from registry import OPEN_STATUSES, TERMINAL_STATUSES
+from swapid import swap_id_time_ms
+
+# Token symbol -> number of minor units in one token (10 ** decimals)
+SCALES = {token["symbol"]: 10 ** token.get("decimals", 8) for token in config["supportedTokens"]}
+DEFAULT_SCALE = 10 ** 8
+
+# Every status a swap can have, so records share one string object per status
+STATUSES = {status: sys.intern(status) for status in OPEN_STATUSES + TERMINAL_STATUSES}
+
+class SwapRecord:
+    """Compact record of one swap.
+
+    Amounts are integers in the token's minor units (USD in cents) packed into
+    one int, statuses and DEX names are interned, the currency pair, exchange
+    rate and fee percentages are one tuple shared by every swap quoted from the
+    same quote, user IDs and price versions are shared between swaps, and the
+    creation time (epoch seconds) is read from the swap ID. Fields most swaps
+    never set live in `extra`, which stays None until one is set, so a record
+    costs a fraction of the equivalent dict. It still reads and writes like the
+    old swap dicts (swap["fromAmount"], swap.get("dexName")): display values
+    such as float amounts, fees and the timestamp string are computed from the
+    compact fields only when read.
+    """
+
+    __slots__ = ("id", "user_id", "status", "terms", "amounts", "price_version", "dex_name", "dex_tx_id", "extra")
+
+    def __init__(self, id, user_id, from_currency, to_currency, usd_amount, from_amount, to_amount,
+                 exchange_rate, platform_fee_percent, exchange_fee_percent, status="pending",
+                 created_at=None, price_version=None, source_address=None, destination_address=None):
+        self.id = id
+        self.user_id = _share(_USER_IDS, int(user_id), SHARED_USER_IDS)
+        self.status = STATUSES[status]
+        self.terms = quote_terms(from_currency, to_currency, exchange_rate, platform_fee_percent, exchange_fee_percent)
+        self.amounts = pack_amounts(
+            round(usd_amount * 100),
+            amount_to_units(from_amount, from_currency),
+            amount_to_units(to_amount, to_currency)
+        )
+        self.price_version = _share(_PRICE_VERSIONS, price_version, SHARED_PRICE_VERSIONS)
+        self.dex_name = None
+        self.dex_tx_id = None
+        self.extra = None
+        if created_at is not None and swap_id_time_ms(id) is None:
+            self.set_extra("created_at", created_at)
+        self.set_extra("source_address", _intern(source_address))
+        self.set_extra("destination_address", _intern(destination_address))
+
+    def get_extra(self, key):
+        """Get a rarely set field (None if unset)"""
+        return self.extra.get(key) if self.extra is not None else None
+
+    def set_extra(self, key, value):
+        """Set a rarely set field (None unsets it)"""
+        if value is None:
+            if self.extra is not None:
+                self.extra.pop(key, None)
+                if not self.extra:
+                    self.extra = None
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    # Dict-style access under the original swap keys
+
+    def __getitem__(self, key):
+        getter = _GETTERS.get(key)
+        if getter is None:
+            raise KeyError(key)
+        value = getter(self)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        setter = _SETTERS.get(key)
+        if setter is None:
+            raise KeyError(f"Swap records have no field {key}")
+        setter(self, value)
+
+    def __contains__(self, key):
+        getter = _GETTERS.get(key)
+        return getter is not None and getter(self) is not None
+
+    def get(self, key, default=None):
+        getter = _GETTERS.get(key)
+        value = getter(self) if getter is not None else None
+        return default if value is None else value
+
+    def keys(self):
+        return [key for key, getter in _GETTERS.items() if getter(self) is not None]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    # Persistence
+
+    def dump(self):
+        """Get the compact fields as a JSON-ready dict (the quote terms and amounts are stored flat)"""
+        data = {slot: getattr(self, slot) for slot in self.__slots__ if getattr(self, slot) is not None}
+        (data["from_currency"], data["to_currency"], data["exchange_rate"],
+         data["platform_fee_percent"], data["exchange_fee_percent"]) = data.pop("terms")
+        data["usd_cents"], data["from_units"], data["to_units"] = unpack_amounts(data.pop("amounts"))
+        return data
+
+    @classmethod
+    def load(cls, data):
+        """Build a record from dump() output, or from an old-style swap dict with float amounts"""
+        if "from_units" not in data:
+            return cls._from_legacy(data)
+        record = cls.__new__(cls)
+        for slot in cls.__slots__:
+            setattr(record, slot, data.get(slot))
+        record.user_id = _share(_USER_IDS, record.user_id, SHARED_USER_IDS)
+        record.status = STATUSES[record.status]
+        record.terms = quote_terms(
+            data["from_currency"], data["to_currency"], data["exchange_rate"],
+            data.get("platform_fee_percent", 0), data.get("exchange_fee_percent", 0)
+        )
+        record.amounts = pack_amounts(data["usd_cents"], data["from_units"], data["to_units"])
+        record.price_version = _share(_PRICE_VERSIONS, record.price_version, SHARED_PRICE_VERSIONS)
+        record.dex_name = _intern(record.dex_name)
+        return record
+
+    @classmethod
+    def _from_legacy(cls, data):
+        """Convert a swap dict written before records were compact"""
+        try:
+            created_at = int(time.mktime(time.strptime(data["timestamp"], "%Y-%m-%d %H:%M:%S")))
+        except (KeyError, ValueError):
+            created_at = None
+        record = cls(
+            id=data["id"],
+            user_id=data["userId"],
+            from_currency=data["fromCurrency"],
+            to_currency=data["toCurrency"],
+            usd_amount=data.get("usdAmount", 0),
+            from_amount=data["fromAmount"],
+            to_amount=data["toAmount"],
+            exchange_rate=data["exchangeRate"],
+            platform_fee_percent=data.get("platformFeePercent", 0),
+            exchange_fee_percent=data.get("exchangeFeePercent", 0),
+            status=data["status"],
+            created_at=created_at,
+            price_version=data.get("priceVersion"),
+            source_address=data.get("sourceAddress"),
+            destination_address=data.get("destinationAddress")
+        )
+        record.dex_name = _intern(data.get("dexName"))
+        record.dex_tx_id = data.get("dexTxId")
+        record.set_extra("error", data.get("error"))
+        record.set_extra("status_message_id", data.get("statusMessageId"))
+        return record
+
+    # Quote terms and amounts
+
+    @property
+    def from_currency(self):
+        return self.terms[0]
+
+    @property
+    def to_currency(self):
+        return self.terms[1]
+
+    @property
+    def exchange_rate(self):
+        return self.terms[2]
+
+    @property
+    def platform_fee_percent(self):
+        return self.terms[3]
+
+    @property
+    def exchange_fee_percent(self):
+        return self.terms[4]
+
+    @property
+    def usd_cents(self):
+        return self.amounts >> (2 * AMOUNT_BITS)
+
+    @property
+    def from_units(self):
+        return (self.amounts >> AMOUNT_BITS) & AMOUNT_MASK
+
+    @property
+    def to_units(self):
+        return self.amounts & AMOUNT_MASK
+
+    # Display values, computed on read
+
+    @property
+    def usd_amount(self):
+        return self.usd_cents / 100
+
+    @property
+    def from_amount(self):
+        return units_to_amount(self.from_units, self.from_currency)
+
+    @property
+    def to_amount(self):
+        return units_to_amount(self.to_units, self.to_currency)
+
+    @property
+    def estimated_amount(self):
+        """Target amount before fees"""
+        return self.from_amount * self.exchange_rate
+
+    @property
+    def platform_fee(self):
+        return self.estimated_amount * (self.platform_fee_percent / 100)
+
+    @property
+    def exchange_fee(self):
+        return self.estimated_amount * (self.exchange_fee_percent / 100)
+
+    @property
+    def created_at(self):
+        """Creation time in epoch seconds"""
+        created_ms = swap_id_time_ms(self.id)
+        return created_ms // 1000 if created_ms is not None else self.get_extra("created_at")
+
+    @property
+    def timestamp(self):
+        created_at = self.created_at
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at)) if created_at is not None else None
+
+# Recently used quote terms, user IDs and price versions, so swaps sharing one
+# share a single object; evicted values simply stop being shared
+QUOTE_TERMS_CACHE_SIZE = 4096
+SHARED_USER_IDS = 65536
+SHARED_PRICE_VERSIONS = 1024
+_QUOTE_TERMS = OrderedDict()
+_USER_IDS = OrderedDict()
+_PRICE_VERSIONS = OrderedDict()
+
+def quote_terms(from_currency, to_currency, exchange_rate, platform_fee_percent, exchange_fee_percent):
+    """Get the shared (from, to, exchange rate, platform fee %, exchange fee %) tuple for these values"""
+    key = (sys.intern(from_currency), sys.intern(to_currency), exchange_rate, platform_fee_percent, exchange_fee_percent)
+    return _share(_QUOTE_TERMS, key, QUOTE_TERMS_CACHE_SIZE)
+
+def _share(cache, value, max_size):
+    """Get the shared copy of `value` from a bounded LRU cache, adding it if new"""
+    if value is None:
+        return None
+    shared = cache.get(value)
+    if shared is None:
+        shared = cache[value] = value
+        if len(cache) > max_size:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(value)
+    return shared
+
+# The three amounts of a swap packed into one int, like the fields of a swap ID:
+# USD cents in the high bits, then source units, then target units
+AMOUNT_BITS = 80
+AMOUNT_MASK = (1 << AMOUNT_BITS) - 1
+
+def pack_amounts(usd_cents, from_units, to_units):
+    """Pack a swap's USD cents and source and target minor units into one int"""
+    if not (0 <= usd_cents and 0 <= from_units <= AMOUNT_MASK and 0 <= to_units <= AMOUNT_MASK):
+        raise ValueError("Swap amounts must be non-negative and fit in 80 bits of minor units")
+    return (usd_cents << (2 * AMOUNT_BITS)) | (from_units << AMOUNT_BITS) | to_units
+
+def unpack_amounts(amounts):
+    """Split packed amounts back into (USD cents, source units, target units)"""
+    return amounts >> (2 * AMOUNT_BITS), (amounts >> AMOUNT_BITS) & AMOUNT_MASK, amounts & AMOUNT_MASK
+
+def amount_to_units(amount, currency):
+    """Convert a token amount to integer minor units"""
+    return round(amount * SCALES.get(currency, DEFAULT_SCALE))
+
+def units_to_amount(units, currency):
+    """Convert integer minor units to a token amount"""
+    return units / SCALES.get(currency, DEFAULT_SCALE)
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _set_status(record, status):
+    record.status = STATUSES[status]
+
+def _set_dex_name(record, name):
+    record.dex_name = _intern(name)
+
+# Original swap keys -> how to read and write them on a record
+_GETTERS = {
+    "id": lambda r: r.id,
+    "userId": lambda r: str(r.user_id),
+    "fromCurrency": lambda r: r.from_currency,
+    "toCurrency": lambda r: r.to_currency,
+    "usdAmount": lambda r: r.usd_amount,
+    "fromAmount": lambda r: r.from_amount,
+    "toAmount": lambda r: r.to_amount,
+    "exchangeRate": lambda r: r.exchange_rate,
+    "priceVersion": lambda r: r.price_version,
+    "platformFee": lambda r: r.platform_fee,
+    "exchangeFee": lambda r: r.exchange_fee,
+    "platformFeePercent": lambda r: r.platform_fee_percent,
+    "exchangeFeePercent": lambda r: r.exchange_fee_percent,
+    "fee": lambda r: r.platform_fee_percent + r.exchange_fee_percent,
+    "status": lambda r: r.status,
+    "timestamp": lambda r: r.timestamp,
+    "sourceAddress": lambda r: r.get_extra("source_address"),
+    "destinationAddress": lambda r: r.get_extra("destination_address"),
+    "dexName": lambda r: r.dex_name,
+    "dexTxId": lambda r: r.dex_tx_id,
+    "error": lambda r: r.get_extra("error"),
+    "dexOrderKey": lambda r: r.get_extra("dex_order_key"),
+    "statusMessageId": lambda r: r.get_extra("status_message_id")
+}
+
+_SETTERS = {
+    "status": _set_status,
+    "dexName": _set_dex_name,
+    "dexTxId": lambda r, value: setattr(r, "dex_tx_id", value),
+    "error": lambda r, value: r.set_extra("error", value),
+    "dexOrderKey": lambda r, value: r.set_extra("dex_order_key", value),
+    "statusMessageId": lambda r, value: r.set_extra("status_message_id", value)
+}
@@ -0,0 +1,147 @@
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from types import MappingProxyType
+
+# Statuses a swap can no longer leave
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Statuses of swaps that are still in flight
+OPEN_STATUSES = ("pending", "initiating", "processing")
+
+class SwapView(Mapping):
+    """Read-only view over the registry restricted to a set of swap IDs"""
+
+    def __init__(self, swaps, swap_ids):
+        self._swaps = swaps
+        self._swap_ids = swap_ids
+
+    def __getitem__(self, swap_id):
+        if swap_id not in self._swap_ids:
+            raise KeyError(swap_id)
+        return self._swaps[swap_id]
+
+    def __iter__(self):
+        return iter(self._swap_ids)
+
+    def __len__(self):
+        return len(self._swap_ids)
+
+class OpenSwapView(Mapping):
+    """Read-only view over the registry restricted to swaps with an open status"""
+
+    def __init__(self, swaps, status_index):
+        self._swaps = swaps
+        self._status_index = status_index
+
+    def __getitem__(self, swap_id):
+        swap = self._swaps[swap_id]
+        if swap["status"] not in self._status_index:
+            raise KeyError(swap_id)
+        return swap
+
+    def __iter__(self):
+        for swap_ids in self._status_index.values():
+            yield from swap_ids
+
+    def __len__(self):
+        return sum(len(swap_ids) for swap_ids in self._status_index.values())
+
+class SwapRegistry:
+    """Single state-tagged table of cached swaps with O(1) lookup by ID.
+
+    Every cached swap lives in one dict. Open swaps are also tracked in a
+    per-status index, and finished swaps in an LRU so the cache stays bounded.
+    Finishing a swap only flips its status tag; the record never moves.
+    """
+
+    def __init__(self, cache_size):
+        self.cache_size = cache_size
+        self.swaps = {}
+        self.status_index = {status: {} for status in OPEN_STATUSES}
+        self.finished = OrderedDict()
+
+        # Zero-copy read-only views
+        self.all_view = MappingProxyType(self.swaps)
+        self.open_view = OpenSwapView(self.swaps, self.status_index)
+        self.finished_view = SwapView(self.swaps, self.finished)
+
+    def __contains__(self, swap_id):
+        return swap_id in self.swaps
+
+    def get(self, swap_id):
+        """Get a cached swap by ID (None if not cached)"""
+        swap = self.swaps.get(swap_id)
+        if swap is not None and swap_id in self.finished:
+            self.finished.move_to_end(swap_id)
+        return swap
+
+    def add(self, swap_record):
+        """Add a swap to the registry under its current status"""
+        swap_id = swap_record["id"]
+        self.swaps[swap_id] = swap_record
+        status = swap_record["status"]
+        if status in self.status_index:
+            self.status_index[status][swap_id] = None
+        else:
+            self._mark_finished(swap_id)
+
+    def set_status(self, swap_record, status):
+        """Flip the status tag of a cached swap"""
+        swap_id = swap_record["id"]
+        old_status = swap_record["status"]
+        if old_status in self.status_index:
+            self.status_index[old_status].pop(swap_id, None)
+
+        swap_record["status"] = status
+        if swap_id not in self.swaps:
+            self.swaps[swap_id] = swap_record
+
+        if status in self.status_index:
+            self.status_index[status][swap_id] = None
+        else:
+            self._mark_finished(swap_id)
+
+    def get_by_status(self, status):
+        """Get all cached swaps with an open status, oldest first"""
+        return [self.swaps[swap_id] for swap_id in self.status_index[status]]
+
+    def _mark_finished(self, swap_id):
+        """Track a finished swap for eviction, dropping the least recently used ones"""
+        self.finished[swap_id] = None
+        self.finished.move_to_end(swap_id)
+        while len(self.finished) > self.cache_size:
+            evicted_id, _ = self.finished.popitem(last=False)
+            del self.swaps[evicted_id]
+
+class RecentSwaps:
+    """Bounded ring buffer of each user's latest swaps, for /status suggestions.
+
+    Each user keeps the last `per_user` (swap ID, summary) pairs, newest last,
+    and only the `max_users` most recently active users are kept, so memory stays
+    bounded and a lookup never touches the store.
+    """
+
+    def __init__(self, per_user, max_users):
+        self.per_user = per_user
+        self.max_users = max_users
+
+        # user ID -> deque of (swap ID, summary), least recently active user first
+        self.users = OrderedDict()
+
+    def add(self, swap_record):
+        """Remember a user's swap"""
+        user_id = swap_record["userId"]
+        ring = self.users.get(user_id)
+        if ring is None:
+            ring = self.users[user_id] = deque(maxlen=self.per_user)
+            while len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+        else:
+            self.users.move_to_end(user_id)
+        summary = f"${swap_record['usdAmount']:.2f} {swap_record['fromCurrency']} → {swap_record['toCurrency']}"
+        ring.append((swap_record["id"], summary))
+
+    def get(self, user_id):
+        """Get a user's recent (swap ID, summary) pairs, newest first"""
+        ring = self.users.get(user_id)
+        return list(reversed(ring)) if ring is not None else []
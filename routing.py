@@ -0,0 +1,156 @@
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Exchange fee assumed for a pair until a live quote reports the real one
+DEFAULT_FEE_PERCENT = 0.2
+
+# Margin (in -log rate) left on a marked down edge so the cycle is strictly unprofitable
+CYCLE_TOLERANCE = 1e-9
+
+class RouteTable:
+    """Precomputed best multi-hop routes between every pair of tokens.
+
+    Tokens are nodes and every quoted pair in the RateMatrix is an edge weighted
+    by -log(rate * (1 - fee)), so the shortest path is the route that leaves the
+    user with the most of the target token. The matrix holds the base rates, not
+    every live DEX quote, so routes stay stable between quotes. All-pairs shortest
+    paths are recomputed with a vectorized Floyd-Warshall the first time a route
+    is needed after the rates change, which makes a route lookup O(1) at swap time.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.built_version = None
+
+        n = len(matrix.tokens)
+
+        # Combined rate and fee (in percent) of the best route for every pair
+        self.route_rates = np.full((n, n), np.nan)
+        self.route_fees = np.zeros((n, n))
+
+        # next_hop[i, j] is the token after i on the best route to j (-1 if none)
+        self.next_hop = np.full((n, n), -1, dtype=np.intp)
+
+        # (from, to) -> route quote, filled lazily after each rebuild
+        self.routes = {}
+
+        self.rebuild()
+
+    def has_direct(self, from_currency, to_currency):
+        """Check if a pair is quoted directly"""
+        return self.matrix.has_rate(from_currency, to_currency)
+
+    def refresh(self):
+        """Recompute the routes if the rates changed since the last rebuild"""
+        if self.built_version != self.matrix.version:
+            self.rebuild()
+
+    def rebuild(self):
+        """Recompute the best route between every pair of tokens (Floyd-Warshall)"""
+        rates = self.matrix.rates
+        fees = self.matrix.fees
+        tokens = self.matrix.tokens
+
+        quoted = rates > 0  # False for NaN
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(quoted, -np.log(rates * (1 - fees / 100)), np.inf)
+            gross = np.where(quoted, -np.log(rates), np.inf)
+
+        # A negative diagonal means an arbitrage cycle, where shortest paths are
+        # undefined. Rather than giving up on every route through the cycle, mark
+        # down the likeliest mispriced edge on it until the cycle gains nothing,
+        # and recompute until no cycle is left. Only that edge's rate changes.
+        adjusted = []
+        while True:
+            dist, gross_dist, next_hop = self._shortest_paths(weight, gross)
+            cyclic = np.flatnonzero(np.diag(dist) < 0)
+            if not len(cyclic):
+                break
+            cycle = self._find_cycle(next_hop, int(cyclic[0]))
+            # -log rates depend on the tokens' units, so compare edges by the
+            # weight of going there and back, which does not
+            i, j = min(cycle, key=lambda edge: weight[edge] + weight[edge[::-1]])
+            gain = -sum(weight[edge] for edge in cycle) + CYCLE_TOLERANCE
+            weight[i, j] += gain
+            gross[i, j] += gain
+            adjusted.append(f"{tokens[i]}-{tokens[j]}")
+        if adjusted:
+            log.warning("Arbitrage cycle in exchange rates; marked down %s for routing", ", ".join(adjusted))
+
+        reachable = np.isfinite(dist)
+        with np.errstate(over="ignore", invalid="ignore"):
+            self.route_rates = np.where(reachable, np.exp(-gross_dist), np.nan)
+            self.route_fees = np.where(reachable, (1 - np.exp(gross_dist - dist)) * 100, 0.0)
+        self.next_hop = np.where(reachable, next_hop, -1)
+        self.routes = {}
+        self.built_version = self.matrix.version
+
+    @staticmethod
+    def _shortest_paths(weight, gross):
+        """All-pairs shortest paths over the edge weights, carrying the fee-free weights along"""
+        n = len(weight)
+        dist = weight.copy()
+        gross = gross.copy()
+        next_hop = np.where(np.isfinite(weight), np.arange(n)[None, :], -1)
+
+        np.fill_diagonal(dist, 0.0)
+        np.fill_diagonal(gross, 0.0)
+        np.fill_diagonal(next_hop, np.arange(n))
+
+        for k in range(n):
+            candidate = dist[:, k, None] + dist[None, k, :]
+            better = candidate < dist
+            dist = np.where(better, candidate, dist)
+            gross = np.where(better, gross[:, k, None] + gross[None, k, :], gross)
+            next_hop = np.where(better, next_hop[:, k, None], next_hop)
+        return dist, gross, next_hop
+
+    @staticmethod
+    def _find_cycle(next_hop, start):
+        """Get the edges of the cycle reached by following next hops towards `start`"""
+        # Walk until a token repeats; the tokens from its first visit on form the cycle
+        seen = {}
+        walk = []
+        node = start
+        while node not in seen:
+            seen[node] = len(walk)
+            walk.append(node)
+            node = int(next_hop[node, start])
+        cycle = walk[seen[node]:] + [node]
+        return list(zip(cycle, cycle[1:]))
+
+    def get_route(self, from_currency, to_currency):
+        """Get the precomputed best route quote for a pair"""
+        key = (from_currency, to_currency)
+        self.refresh()
+        route = self.routes.get(key)
+        if route is not None:
+            return route
+
+        index = self.matrix.index
+        i, j = index.get(from_currency), index.get(to_currency)
+        if i is None or j is None or i == j or self.next_hop[i, j] < 0:
+            raise ValueError(f"Exchange rate not available for {from_currency}-{to_currency}")
+
+        path = self._build_path(i, j)
+        route = {
+            "rate": float(self.route_rates[i, j]),
+            "exchangeFeePercent": float(self.route_fees[i, j]),
+            "route": path,
+            "source": "Route: " + " → ".join(path)
+        }
+        self.routes[key] = route
+        return route
+
+    def _build_path(self, i, j):
+        """Reconstruct the token path from i to j"""
+        tokens = self.matrix.tokens
+        path = [tokens[i]]
+        while i != j:
+            i = int(self.next_hop[i, j])
+            if i < 0 or len(path) > len(tokens):
+                raise ValueError(f"Exchange rate not available for {path[0]}-{tokens[j]}")
+            path.append(tokens[i])
+        return path
@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from logs import log_context
+from metrics import stage_latency
+
+log = logging.getLogger(__name__)
+
+class SchedulerFullError(Exception):
+    """Raised when the scheduler is already tracking its maximum number of swaps"""
+    pass
+
+class SwapScheduler:
+    """Central state machine driver for swaps.
+
+    Every in-flight swap is one entry in a timer heap keyed by the time its next
+    stage is due. A single timer task moves due entries onto a bounded ready
+    queue, and a fixed pool of workers runs the stage handlers with a per-stage
+    deadline. A handler returns (next_stage, delay) to schedule the next stage or
+    None when the swap is done. Thousands of waiting swaps therefore cost one heap
+    entry each instead of one sleeping task each.
+    """
+
+    def __init__(self, workers, max_in_flight, stage_deadlines, default_deadline=60):
+        self.worker_count = workers
+        self.max_in_flight = max_in_flight
+        self.stage_deadlines = stage_deadlines
+        self.default_deadline = default_deadline
+
+        # stage -> async handler(swap_id)
+        self.handlers = {}
+
+        # async on_error(swap_id, stage, error), called when a stage raises or times out
+        self.on_error = None
+
+        # (due time, sequence, swap_id, stage)
+        self.heap = []
+        self.sequence = itertools.count()
+
+        # swap_id -> stage for every swap the scheduler is tracking
+        self.jobs = {}
+
+        self.ready = None
+        self.wakeup = None
+        self.tasks = []
+        self.running = 0
+
+    def register(self, stage, handler):
+        """Register the handler for a stage"""
+        self.handlers[stage] = handler
+
+    def start(self):
+        """Start the timer task and the worker pool on the running loop"""
+        if self.tasks:
+            return
+
+        self.ready = asyncio.Queue(maxsize=self.worker_count * 2)
+        self.wakeup = asyncio.Event()
+        self.tasks.append(asyncio.create_task(self._run_timer()))
+        for _ in range(self.worker_count):
+            self.tasks.append(asyncio.create_task(self._run_worker()))
+
+        # Entries submitted before start are already on the heap
+        self.wakeup.set()
+
+    async def stop(self):
+        """Stop the timer task and the worker pool"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def is_full(self):
+        """Check if new swaps would be rejected"""
+        return len(self.jobs) >= self.max_in_flight
+
+    def submit(self, swap_id, stage, delay=0):
+        """Start driving a swap from the given stage"""
+        if swap_id in self.jobs:
+            return
+        if self.is_full():
+            raise SchedulerFullError(f"Too many swaps in flight ({len(self.jobs)})")
+        self._push(swap_id, stage, delay)
+
+    def resume(self, swap_id, stage):
+        """Re-attach a swap that was in flight before a restart.
+
+        Unlike submit() this ignores max_in_flight: the swap is already accepted,
+        so it is always resumed and new swaps are rejected until the backlog drains.
+        """
+        if swap_id not in self.jobs:
+            self._push(swap_id, stage, 0)
+
+    def get_stats(self):
+        """Get the current queue depths"""
+        return {
+            "inFlight": len(self.jobs),
+            "waiting": len(self.heap),
+            "ready": self.ready.qsize() if self.ready is not None else 0,
+            "running": self.running,
+            "workers": self.worker_count
+        }
+
+    def _push(self, swap_id, stage, delay):
+        """Put a swap on the timer heap"""
+        self.jobs[swap_id] = stage
+        heapq.heappush(self.heap, (time.monotonic() + delay, next(self.sequence), swap_id, stage))
+        if self.wakeup is not None and self.heap[0][2] == swap_id:
+            # The new entry is the earliest; let the timer re-arm
+            self.wakeup.set()
+
+    async def _run_timer(self):
+        """Move due entries from the heap onto the ready queue"""
+        while True:
+            if not self.heap:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            delay = self.heap[0][0] - time.monotonic()
+            if delay > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, swap_id, stage = heapq.heappop(self.heap)
+
+            # Blocks while every worker is busy, which throttles the timer
+            await self.ready.put((swap_id, stage))
+
+    async def _run_worker(self):
+        """Run stage handlers for ready swaps"""
+        while True:
+            swap_id, stage = await self.ready.get()
+            self.running += 1
+            started = time.perf_counter()
+            try:
+                deadline = self.stage_deadlines.get(stage, self.default_deadline)
+                with log_context(swap_id=swap_id):
+                    result = await asyncio.wait_for(self.handlers[stage](swap_id), deadline)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                stage_latency.observe(stage, outcome, value=time.perf_counter() - started)
+                self.jobs.pop(swap_id, None)
+                with log_context(swap_id=swap_id):
+                    await self._handle_error(swap_id, stage, e)
+            else:
+                stage_latency.observe(stage, "ok", value=time.perf_counter() - started)
+                if result is None:
+                    self.jobs.pop(swap_id, None)
+                else:
+                    next_stage, delay = result
+                    self._push(swap_id, next_stage, delay)
+            finally:
+                self.running -= 1
+                self.ready.task_done()
+
+    async def _handle_error(self, swap_id, stage, error):
+        """Report a failed stage to the error callback"""
+        if isinstance(error, asyncio.TimeoutError):
+            error = TimeoutError(f"Stage '{stage}' did not finish in time")
+
+        log.warning("Swap %s failed during stage '%s': %s", swap_id, stage, error)
+        if self.on_error is None:
+            return
+        try:
+            await self.on_error(swap_id, stage, error)
+        except Exception:
+            log.exception("Error handler failed for swap %s", swap_id)
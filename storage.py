@@ -0,0 +1,180 @@
+import json
+import sqlite3
+from config import config
+from records import SwapRecord
+
+class SwapStore:
+    """Base class for swap record storage backends"""
+
+    def save_swap(self, swap_record):
+        """Insert or update a swap record"""
+        raise NotImplementedError
+
+    def get_swap(self, swap_id):
+        """Get a single swap record by ID (None if not found)"""
+        raise NotImplementedError
+
+    def get_user_swaps(self, user_id):
+        """Get all swap records for a user, oldest first"""
+        raise NotImplementedError
+
+    def get_user_swap_ids(self, user_id):
+        """Get the IDs of all swaps for a user, oldest first"""
+        raise NotImplementedError
+
+    def get_swaps_by_status(self, status):
+        """Get all swap records with the given status, oldest first"""
+        raise NotImplementedError
+
+    def scan_swaps(self, lower=None, upper=None, limit=None, newest_first=False):
+        """Get swap records with lower <= id < upper in ID (creation) order.
+
+        For keyset pagination newest first, pass the last ID of a page as the
+        next page's `upper`.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the store"""
+        pass
+
+class MemorySwapStore(SwapStore):
+    """Non-durable store that keeps every swap in a dict (useful for local testing)"""
+
+    def __init__(self):
+        self.swaps = {}
+
+    def save_swap(self, swap_record):
+        """Insert or update a swap record"""
+        self.swaps[swap_record.id] = swap_record.dump()
+
+    def get_swap(self, swap_id):
+        """Get a single swap record by ID (None if not found)"""
+        swap = self.swaps.get(swap_id)
+        return SwapRecord.load(swap) if swap is not None else None
+
+    def get_user_swaps(self, user_id):
+        """Get all swap records for a user, oldest first"""
+        return [SwapRecord.load(swap) for swap in self.swaps.values() if str(swap["user_id"]) == user_id]
+
+    def get_user_swap_ids(self, user_id):
+        """Get the IDs of all swaps for a user, oldest first"""
+        return [swap["id"] for swap in self.swaps.values() if str(swap["user_id"]) == user_id]
+
+    def get_swaps_by_status(self, status):
+        """Get all swap records with the given status, oldest first"""
+        return [SwapRecord.load(swap) for swap in self.swaps.values() if swap["status"] == status]
+
+    def scan_swaps(self, lower=None, upper=None, limit=None, newest_first=False):
+        """Get swap records with lower <= id < upper in ID (creation) order"""
+        swap_ids = sorted(
+            (swap_id for swap_id in self.swaps
+             if (lower is None or swap_id >= lower) and (upper is None or swap_id < upper)),
+            reverse=newest_first
+        )
+        return [SwapRecord.load(self.swaps[swap_id]) for swap_id in swap_ids[:limit]]
+
+class SQLiteSwapStore(SwapStore):
+    """Durable SQLite store (WAL mode) with indexes on id, (userId, id) and (status, id).
+
+    Swap IDs sort in creation order, so the primary key doubles as the time
+    index: history queries and time range scans order and filter on id alone.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config["swapStorePath"]
+        self.conn = sqlite3.connect(self.path)
+
+        # WAL lets readers run alongside the single writer, and NORMAL sync is
+        # still crash-safe in WAL mode while avoiding an fsync per commit
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS swaps (
+                id TEXT PRIMARY KEY,
+                userId TEXT NOT NULL,
+                status TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            DROP INDEX IF EXISTS idx_swaps_user;
+            DROP INDEX IF EXISTS idx_swaps_status;
+            DROP INDEX IF EXISTS idx_swaps_timestamp;
+            CREATE INDEX IF NOT EXISTS idx_swaps_user_id ON swaps (userId, id);
+            CREATE INDEX IF NOT EXISTS idx_swaps_status_id ON swaps (status, id);
+        """)
+
+        # Rows saved while epoch seconds were written to the timestamp column get
+        # the formatted local time back ('' when the creation time was unknown).
+        # Runs once per database; user_version records that it has been done.
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            with self.conn:
+                self.conn.execute("""
+                    UPDATE swaps SET timestamp = CASE WHEN timestamp = '0' THEN ''
+                        ELSE strftime('%Y-%m-%d %H:%M:%S', CAST(timestamp AS INTEGER), 'unixepoch', 'localtime') END
+                    WHERE timestamp != '' AND timestamp NOT GLOB '*[^0-9]*'
+                """)
+                self.conn.execute("PRAGMA user_version = 1")
+
+    def save_swap(self, swap_record):
+        """Insert or update a swap record (stored in its compact form)"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO swaps (id, userId, status, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                (
+                    swap_record.id,
+                    str(swap_record.user_id),
+                    swap_record.status,
+                    swap_record.timestamp or "",
+                    json.dumps(swap_record.dump())
+                )
+            )
+
+    def get_swap(self, swap_id):
+        """Get a single swap record by ID (None if not found)"""
+        row = self.conn.execute("SELECT data FROM swaps WHERE id = ?", (swap_id,)).fetchone()
+        return SwapRecord.load(json.loads(row[0])) if row else None
+
+    def get_user_swaps(self, user_id):
+        """Get all swap records for a user, oldest first"""
+        rows = self.conn.execute(
+            "SELECT data FROM swaps WHERE userId = ? ORDER BY id",
+            (user_id,)
+        )
+        return [SwapRecord.load(json.loads(row[0])) for row in rows]
+
+    def get_user_swap_ids(self, user_id):
+        """Get the IDs of all swaps for a user, oldest first"""
+        rows = self.conn.execute(
+            "SELECT id FROM swaps WHERE userId = ? ORDER BY id",
+            (user_id,)
+        )
+        return [row[0] for row in rows]
+
+    def get_swaps_by_status(self, status):
+        """Get all swap records with the given status, oldest first"""
+        rows = self.conn.execute(
+            "SELECT data FROM swaps WHERE status = ? ORDER BY id",
+            (status,)
+        )
+        return [SwapRecord.load(json.loads(row[0])) for row in rows]
+
+    def scan_swaps(self, lower=None, upper=None, limit=None, newest_first=False):
+        """Get swap records with lower <= id < upper in ID (creation) order"""
+        clauses, params = [], []
+        if lower is not None:
+            clauses.append("id >= ?")
+            params.append(lower)
+        if upper is not None:
+            clauses.append("id < ?")
+            params.append(upper)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if newest_first else "ASC"
+        params.append(-1 if limit is None else limit)
+        rows = self.conn.execute(f"SELECT data FROM swaps {where} ORDER BY id {order} LIMIT ?", params)
+        return [SwapRecord.load(json.loads(row[0])) for row in rows]
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
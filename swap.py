@@ -1,27 +1,178 @@
 import asyncio
+import bisect
 import random
-import json
-import aiohttp
+import time
+import zlib
+import logging
+from collections import OrderedDict
 from config import config
+from embeds import EmbedTemplate
+from journal import SwapJournal
+from logs import set_log_context
+from metrics import dex_latency, swap_transitions
+from records import SwapRecord
+from registry import OPEN_STATUSES, RecentSwaps, SwapRegistry
+from scheduler import SchedulerFullError, SwapScheduler
+from storage import SQLiteSwapStore
+from swapid import swap_id_bounds
+
+log = logging.getLogger(__name__)
+
+# Swap status embeds, compiled once and filled in per swap
+SWAP_INITIATED_EMBED = EmbedTemplate(
+    title="🔄 Swap Initiated",
+    description="Your swap request is being processed.",
+    fields=[
+        ("💼 Swap ID", "{id}"),
+        ("💱 Status", "Initiating"),
+        ("⏳ Estimated Time", "2-10 minutes"),
+    ],
+    color=0x3498db  # Blue color
+)
+
+SWAP_PROCESSING_EMBED = EmbedTemplate(
+    title="⚙️ Swap Processing",
+    description="Your swap request has been accepted by the exchange and is now processing.",
+    fields=[
+        ("💼 Swap ID", "{id}"),
+        ("🏦 Exchange", "{dex}"),
+        ("🔢 Transaction ID", "{txId}"),
+        ("⌛ Estimated Time", "{estimatedCompletionTime}"),
+    ],
+    color=0xf39c12  # Orange color
+)
+
+SWAP_FINISHED_EMBED = EmbedTemplate(
+    title="{title}",
+    description="{description}",
+    fields=[
+        ("💼 Swap ID", "{id}"),
+        ("💱 From", "${usdAmount} (= {fromAmount} {fromCurrency})"),
+        ("💰 To", "{toAmount} {toCurrency}"),
+        ("💹 Exchange Rate", "1 {fromCurrency} = {exchangeRate} {toCurrency}"),
+        ("🏦 Exchange", "{dexName}"),
+        ("💸 Exchange Fee", "{exchangeFee} {toCurrency} ({exchangeFeePercent}%)"),
+        ("🤖 Platform Fee", "{platformFee} {toCurrency} ({platformFeePercent}%)"),
+        ("💵 Total Fees", "{totalFee} {toCurrency} ({totalFeePercent}%)"),
+        ("📊 Status", "{statusLabel}"),
+        ("🕒 Completed At", "{completedAt}"),
+    ],
+    color=0x2ecc71  # Green color
+)
+
+SWAP_FAILED_EMBED = EmbedTemplate(
+    title="❌ Swap Failed",
+    description="{description}",
+    fields=[
+        ("💼 Swap ID", "{id}"),
+        ("❌ Error", "{error}"),
+        ("📞 Support", "Please contact support for assistance."),
+    ],
+    color=0xe74c3c  # Red color
+)
 
 class SwapService:
     """Service for processing cryptocurrency swaps"""
     
-    def __init__(self):
-        self.active_swaps = {}
-        self.completed_swaps = {}
+    def __init__(self, store=None):
+        # The store is the source of truth; the registry is only a hot cache
+        self.store = store if store is not None else SQLiteSwapStore()
+        self.registry = SwapRegistry(config["swapCacheSize"])
+        
+        # Shared HTTP session and bot, attached on startup
+        self.session = None
+        self.bot = None
+        
+        # Central driver for every in-flight swap; each status is a stage
+        self.scheduler = SwapScheduler(
+            workers=config["swapWorkers"],
+            max_in_flight=config["maxInFlightSwaps"],
+            stage_deadlines=config["swapStageDeadlines"]
+        )
+        self.scheduler.register("pending", self.handle_pending)
+        self.scheduler.register("initiating", self.handle_initiating)
+        self.scheduler.register("processing", self.handle_processing)
+        self.scheduler.on_error = self.handle_stage_error
+        
+        # Secondary index: userId -> swap IDs sorted by ID, so pages can be found by
+        # bisection. Users are loaded from the store on first access and the least
+        # recently used are evicted.
+        self.user_index = OrderedDict()
+        self.user_index_size = config["userIndexCacheSize"]
+        
+        # Each user's latest swaps, kept in memory for /status autocomplete
+        self.recent_swaps = RecentSwaps(config["recentSwapsPerUser"], config["recentSwapUsers"])
+        
+        # Crash-safe log of every state transition
+        self.journal = SwapJournal(
+            directory=config["swapJournalDir"],
+            flush_interval=config["journalFlushInterval"],
+            flush_batch=config["journalFlushBatch"],
+            snapshot_interval=config["journalSnapshotInterval"]
+        )
+        
+        # Bring the store up to date with anything journaled but not yet stored
+        for swap in self.journal.recover().values():
+            self.store.save_swap(SwapRecord.load(swap))
+        
+        # Reload swaps that were still in flight when the bot last stopped
+        for status in OPEN_STATUSES:
+            for swap in self.store.get_swaps_by_status(status):
+                self.registry.add(swap)
+                self.recent_swaps.add(swap)
+    
+    def attach_session(self, session):
+        """Use the bot's shared HTTP session for DEX requests"""
+        self.session = session
+    
+    def _user_swap_ids(self, user_id):
+        """Get the sorted swap ID list for a user, loading it from the store on first access"""
+        swap_ids = self.user_index.get(user_id)
+        if swap_ids is None:
+            swap_ids = sorted(self.store.get_user_swap_ids(user_id))
+            self.user_index[user_id] = swap_ids
+            while len(self.user_index) > self.user_index_size:
+                self.user_index.popitem(last=False)
+        else:
+            self.user_index.move_to_end(user_id)
+        return swap_ids
+    
+    def add_swap(self, swap_record):
+        """Register a new swap, index it and persist it"""
+        # Not append: an ID from an older scheme (KONG-<sec>-<n>) can sort after new ones
+        bisect.insort(self._user_swap_ids(swap_record["userId"]), swap_record["id"])
+        self.registry.add(swap_record)
+        self.recent_swaps.add(swap_record)
+        swap_transitions.inc(swap_record["status"])
+        self.journal.append(swap_record)
+        self.store.save_swap(swap_record)
+    
+    def update_status(self, swap_record, status):
+        """Move a swap to a new status, keeping the registry and the store in sync"""
+        self.registry.set_status(swap_record, status)
+        swap_transitions.inc(status)
+        self.journal.append(swap_record)
+        self.store.save_swap(swap_record)
     
     async def initiate_swap_with_dex(self, swap_record):
-        """Initiate a swap with an actual DEX (simulated for demo)"""
-        # Choose a random DEX from the configured list
-        dex = random.choice(config["dexAPIs"])
+        """Initiate a swap with an actual DEX (simulated for demo).
+        
+        The order is placed on the swap's recorded DEX under its recorded order
+        key, which the DEX uses to deduplicate, so sending it again after a
+        restart returns the original order instead of placing a second one.
+        """
+        dex = next((dex for dex in config["dexAPIs"] if dex["name"] == swap_record["dexName"]), None)
+        if dex is None:
+            return {"success": False, "error": f"Exchange {swap_record['dexName']} is no longer configured"}
+        order_key = swap_record["dexOrderKey"]
         from_currency = swap_record["fromCurrency"]
         to_currency = swap_record["toCurrency"]
         amount = swap_record["fromAmount"]
+        started = time.perf_counter()
         
         try:
             # Simulate API call to DEX
-            print(f"Initiating swap with {dex['name']}: {amount} {from_currency} → {to_currency}")
+            log.info("Initiating swap with %s: %s %s → %s", dex["name"], amount, from_currency, to_currency)
             
             # In a real implementation, this would be an actual API call
             # For demo purposes, we'll simulate a response
@@ -29,8 +180,9 @@ class SwapService:
             # Simulate network delay
             await asyncio.sleep(2)
             
-            # Generate a mock transaction ID from the DEX
-            tx_id = f"{dex['name'].lower()}-{random.randint(10000, 99999)}"
+            # Generate a mock transaction ID from the DEX, the same for every request with this order key
+            tx_id = f"{dex['name'].lower()}-{zlib.crc32(order_key.encode()) % 90000 + 10000}"
+            dex_latency.observe(dex["name"], "initiate", "ok", value=time.perf_counter() - started)
             
             return {
                 "success": True,
@@ -40,105 +192,135 @@ class SwapService:
                 "estimatedCompletionTime": "2-10 minutes"
             }
         except Exception as e:
-            print(f"Error initiating swap with DEX: {str(e)}")
+            log.error("Error initiating swap with DEX: %s", e)
+            dex_latency.observe(dex["name"], "initiate", "error", value=time.perf_counter() - started)
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    async def process_swap(self, bot, swap_record):
-        """Process a swap asynchronously with proper tracking"""
-        swap_id = swap_record["id"]
-        user_id = swap_record["userId"]
+    def start(self, bot):
+        """Start the swap scheduler and resume swaps that were in flight at shutdown"""
+        self.bot = bot
+        
+        # Never reissue an ID from before a restart, even if the clock has since stepped back
+        _, upper = swap_id_bounds(end=time.time() + 86400)
+        newest = self.store.scan_swaps(upper=upper, limit=1, newest_first=True)
+        if newest:
+            bot.utils.swap_ids.advance_past(newest[0]["id"])
+        
+        self.journal.start(lambda: self.registry.open_view.values())
+        
+        # Re-attach every open swap at the stage it last reached, even past the in-flight limit
+        for swap_id, swap in self.registry.open_view.items():
+            self.scheduler.resume(swap_id, swap["status"])
+        
+        self.scheduler.start()
+        
+        # Live status updates left from the last run must still record their message IDs
+        bot.notifier.resume_live(self.status_message_callback)
+        
+    async def stop(self):
+        """Stop processing swaps and flush the journal"""
+        await self.scheduler.stop()
+        await self.journal.stop()
+        self.store.close()
+        
+    def submit_swap(self, swap_record):
+        """Register a new swap and hand it to the scheduler (raises SchedulerFullError when saturated)"""
+        if self.scheduler.is_full():
+            raise SchedulerFullError("Too many swaps are being processed right now")
+        self.add_swap(swap_record)
+        self.scheduler.submit(swap_record["id"], swap_record["status"])
+        
+    def notify_user(self, swap_record, embed):
+        """Queue a status update for the swap's owner (later updates for the same swap supersede it)"""
+        if config["notificationMode"] == "live":
+            # One message per swap, edited in place as the status changes
+            self.bot.notifier.notify_live(
+                swap_record["userId"],
+                swap_record["id"],
+                embed,
+                message_id=swap_record.get("statusMessageId"),
+                on_message=lambda message_id: self.set_status_message(swap_record, message_id)
+            )
+        else:
+            self.bot.notifier.notify(swap_record["userId"], embed=embed, key=swap_record["id"])
+    
+    def status_message_callback(self, swap_id):
+        """Callback recording the live status message of a swap (None if the swap is unknown)"""
+        swap_record = self.get_swap(swap_id)
+        if swap_record is None:
+            return None
+        return lambda message_id: self.set_status_message(swap_record, message_id)
+        
+    def set_status_message(self, swap_record, message_id):
+        """Remember the live status message of a swap so restarts keep editing it"""
+        swap_record["statusMessageId"] = message_id
+        self.journal.append(swap_record)
+        self.store.save_swap(swap_record)
         
-        # Store the swap in active swaps
-        self.active_swaps[swap_id] = swap_record
+    async def handle_pending(self, swap_id):
+        """Stage 1: mark the swap as initiating and notify the user"""
+        swap_record = self.get_swap(swap_id)
+        set_log_context(user_id=swap_record["userId"])
         
         # Update swap status to "initiating"
-        swap_record["status"] = "initiating"
+        self.update_status(swap_record, "initiating")
         
         # Notify user about initiation
-        embed = bot.utils.create_embed(
-            title="🔄 Swap Initiated",
-            description=f"Your swap request is being processed.",
-            fields=[
-                {"name": "💼 Swap ID", "value": swap_id},
-                {"name": "💱 Status", "value": "Initiating"},
-                {"name": "⏳ Estimated Time", "value": "2-10 minutes"},
-            ],
-            color=0x3498db  # Blue color
-        )
-        
-        try:
-            user = await bot.fetch_user(int(user_id))
-            await user.send(embed=embed)
-        except Exception as e:
-            print(f"Could not send initiation DM to user {user_id}: {str(e)}")
+        embed = SWAP_INITIATED_EMBED.render(id=swap_id)
+        self.notify_user(swap_record, embed)
         
         # Simulate initial processing
-        await asyncio.sleep(3)
+        return "initiating", 3
+        
+    async def handle_initiating(self, swap_id):
+        """Stage 2: initiate the swap with a DEX"""
+        swap_record = self.get_swap(swap_id)
+        set_log_context(user_id=swap_record["userId"])
+        
+        if swap_record.get("dexOrderKey") is None:
+            # Choose a random DEX and make the order durable before placing it,
+            # so a swap resumed after a crash repeats this order instead of
+            # placing a new one
+            swap_record["dexName"] = random.choice(config["dexAPIs"])["name"]
+            swap_record["dexOrderKey"] = swap_id
+            self.journal.append(swap_record)
+            self.store.save_swap(swap_record)
+            await self.journal.flush()
+        else:
+            log.info("Resuming DEX order %s on %s", swap_record["dexOrderKey"], swap_record["dexName"])
         
         # Actually initiate the swap with a DEX
         dex_result = await self.initiate_swap_with_dex(swap_record)
         
         if not dex_result["success"]:
             # DEX swap failed
-            swap_record["status"] = "failed"
-            swap_record["error"] = dex_result.get("error", "Unknown error")
-            
-            error_embed = bot.utils.create_embed(
-                title="❌ Swap Failed",
-                description=f"Your swap could not be initiated with the exchange.",
-                fields=[
-                    {"name": "💼 Swap ID", "value": swap_id},
-                    {"name": "❌ Error", "value": swap_record["error"]},
-                    {"name": "📞 Support", "value": "Please contact support for assistance."}
-                ],
-                color=0xe74c3c  # Red color
-            )
-            
-            try:
-                user = await bot.fetch_user(int(user_id))
-                await user.send(embed=error_embed)
-            except:
-                print(f"Could not send error DM to user {user_id}")
-                
-            # Move to completed swaps (as failed)
-            self.completed_swaps[swap_id] = swap_record
-            del self.active_swaps[swap_id]
-            return
+            await self.fail_swap(swap_record, dex_result.get("error", "Unknown error"), "Your swap could not be initiated with the exchange.")
+            return None
         
         # Update swap with DEX information
         swap_record["dexName"] = dex_result["dex"]
         swap_record["dexTxId"] = dex_result["txId"]
-        swap_record["status"] = "processing"
+        self.update_status(swap_record, "processing")
         
         # Notify user that DEX has accepted the swap
-        processing_embed = bot.utils.create_embed(
-            title="⚙️ Swap Processing",
-            description=f"Your swap request has been accepted by the exchange and is now processing.",
-            fields=[
-                {"name": "💼 Swap ID", "value": swap_id},
-                {"name": "🏦 Exchange", "value": dex_result["dex"]},
-                {"name": "🔢 Transaction ID", "value": dex_result["txId"]},
-                {"name": "⌛ Estimated Time", "value": dex_result["estimatedCompletionTime"]},
-            ],
-            color=0xf39c12  # Orange color
-        )
-        
-        try:
-            user = await bot.fetch_user(int(user_id))
-            await user.send(embed=processing_embed)
-        except:
-            print(f"Could not send processing DM to user {user_id}")
+        processing_embed = SWAP_PROCESSING_EMBED.render(id=swap_id, **dex_result)
+        self.notify_user(swap_record, processing_embed)
         
         # Simulate exchange processing time
-        await asyncio.sleep(10)  # Reduced for demo purposes
+        return "processing", 10  # Reduced for demo purposes
+        
+    async def handle_processing(self, swap_id):
+        """Stage 3: settle the swap and send the final summary"""
+        swap_record = self.get_swap(swap_id)
+        set_log_context(user_id=swap_record["userId"])
         
         # Simulate success (with a small chance of failure)
         success = random.random() > 0.1  # 90% chance of success
         
-        swap_record["status"] = "completed" if success else "failed"
+        self.update_status(swap_record, "completed" if success else "failed")
         
         # Generate final swap details
         status_message = "Your swap has been completed successfully!" if success else "Your swap has failed. Please try again or contact support."
@@ -149,42 +331,102 @@ class SwapService:
         exchange_fee = swap_record["exchangeFee"]
         total_fee = platform_fee + exchange_fee
         
-        embed = bot.utils.create_embed(
+        embed = SWAP_FINISHED_EMBED.render(
+            color=status_color,
             title="✅ Swap Completed" if success else "❌ Swap Failed",
             description=status_message,
-            fields=[
-                {"name": "💼 Swap ID", "value": swap_id},
-                {"name": "💱 From", "value": f"${swap_record['usdAmount']} (= {swap_record['fromAmount']} {swap_record['fromCurrency']})"},
-                {"name": "💰 To", "value": f"{swap_record['toAmount']} {swap_record['toCurrency']}"},
-                {"name": "💹 Exchange Rate", "value": f"1 {swap_record['fromCurrency']} = {swap_record['exchangeRate']} {swap_record['toCurrency']}"},
-                {"name": "🏦 Exchange", "value": swap_record["dexName"]},
-                {"name": "💸 Exchange Fee", "value": f"{swap_record['exchangeFee']} {swap_record['toCurrency']} ({swap_record['exchangeFeePercent']}%)"},
-                {"name": "🤖 Platform Fee", "value": f"{swap_record['platformFee']} {swap_record['toCurrency']} ({swap_record['platformFeePercent']}%)"},
-                {"name": "💵 Total Fees", "value": f"{total_fee} {swap_record['toCurrency']} ({swap_record['exchangeFeePercent'] + swap_record['platformFeePercent']}%)"},
-                {"name": "📊 Status", "value": swap_record["status"].capitalize()},
-                {"name": "🕒 Completed At", "value": bot.utils.get_timestamp()},
-            ],
-            color=status_color
+            totalFee=total_fee,
+            totalFeePercent=swap_record["exchangeFeePercent"] + swap_record["platformFeePercent"],
+            statusLabel=swap_record["status"].capitalize(),
+            completedAt=self.bot.utils.get_timestamp(),
+            **swap_record
         )
+        self.notify_user(swap_record, embed)
+        return None
         
-        try:
-            user = await bot.fetch_user(int(user_id))
-            await user.send(embed=embed)
-        except:
-            print(f"Could not send final DM to user {user_id}")
-            
-        # Move to completed swaps
-        self.completed_swaps[swap_id] = swap_record
-        del self.active_swaps[swap_id]
+    async def handle_stage_error(self, swap_id, stage, error):
+        """Fail a swap whose stage raised or missed its deadline, so it never stays stuck"""
+        swap_record = self.get_swap(swap_id)
+        if swap_record is None or swap_record["status"] not in OPEN_STATUSES:
+            return
+        await self.fail_swap(swap_record, str(error), "Your swap could not be processed.")
+        
+    async def fail_swap(self, swap_record, error, description):
+        """Mark a swap as failed and notify the user"""
+        swap_record["error"] = error
+        
+        # Move to completed swaps (as failed)
+        self.update_status(swap_record, "failed")
+        
+        error_embed = SWAP_FAILED_EMBED.render(id=swap_record["id"], error=error, description=description)
+        self.notify_user(swap_record, error_embed)
+        
+    def get_swap(self, swap_id):
+        """Get a swap by ID from the registry, falling back to the store (None if not found)"""
+        swap = self.registry.get(swap_id)
+        if swap is None:
+            swap = self.store.get_swap(swap_id)
+            if swap is not None:
+                self.registry.add(swap)
+        return swap
+        
+    def get_user_swaps(self, user_id):
+        """Get all swaps initiated by a user in ID order (O(k) in the user's swap count)"""
+        swaps = []
+        for swap_id in self._user_swap_ids(user_id):
+            swap = self.get_swap(swap_id)
+            if swap is not None:
+                swaps.append(swap)
+        return swaps
+        
+    def get_user_swaps_page(self, user_id, before_id=None, limit=20):
+        """Get up to `limit` of a user's swaps with IDs before `before_id`, highest ID first"""
+        swap_ids = self._user_swap_ids(user_id)
+        end = bisect.bisect_left(swap_ids, before_id) if before_id is not None else len(swap_ids)
+        page = []
+        for swap_id in reversed(swap_ids[max(0, end - limit):end]):
+            swap = self.get_swap(swap_id)
+            if swap is not None:
+                page.append(swap)
+        return page
+        
+    def get_swaps_created_between(self, start=None, end=None, before_id=None, limit=100):
+        """Get up to `limit` swaps created in [start, end) (Unix seconds) and before `before_id`, newest first"""
+        lower, upper = swap_id_bounds(start, end)
+        if before_id is not None and (upper is None or before_id < upper):
+            upper = before_id
+        return self.store.scan_swaps(lower, upper, limit, newest_first=True)
+        
+    def suggest_swaps(self, user_id, text="", limit=25):
+        """Get (swap ID, label) suggestions from a user's recent swaps whose ID contains `text`, newest first"""
+        text = text.strip().upper()
+        suggestions = []
+        for swap_id, summary in self.recent_swaps.get(user_id):
+            if text in swap_id:
+                # Only cached swaps show a status; the store is never read here
+                swap = self.registry.swaps.get(swap_id)
+                label = f"{swap_id} · {summary}"
+                if swap is not None:
+                    label += f" · {swap['status']}"
+                suggestions.append((swap_id, label))
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+        
+    def get_swaps_by_status(self, status):
+        """Get all swaps with the given status, oldest first"""
+        if status in OPEN_STATUSES:
+            return self.registry.get_by_status(status)
+        return self.store.get_swaps_by_status(status)
         
     def get_all_swaps(self):
-        """Get all swaps (active and completed)"""
-        return {**self.active_swaps, **self.completed_swaps}
+        """Get a read-only view of all cached swaps (active and recently completed)"""
+        return self.registry.all_view
         
     def get_active_swaps(self):
-        """Get all active swaps"""
-        return self.active_swaps
+        """Get a read-only view of all active swaps"""
+        return self.registry.open_view
         
     def get_completed_swaps(self):
-        """Get all completed swaps"""
-        return self.completed_swaps
+        """Get a read-only view of recently completed swaps"""
+        return self.registry.finished_view
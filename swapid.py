@@ -0,0 +1,86 @@
+import time
+
+# Crockford base32: digits then letters without I, L, O and U, in ASCII order
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+PREFIX = "KONG-"
+
+# Layout of the 80 bits behind an ID: milliseconds since the Unix epoch, shard, sequence
+TIME_BITS = 48
+SHARD_BITS = 10
+SEQUENCE_BITS = 22
+ID_LENGTH = (TIME_BITS + SHARD_BITS + SEQUENCE_BITS) // 5
+
+MAX_SHARD = (1 << SHARD_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+
+class SwapIdGenerator:
+    """Snowflake-style swap IDs that sort lexicographically in creation order.
+
+    Each ID packs the creation time in milliseconds, a shard number and a
+    per-millisecond sequence into 80 bits, written as 16 fixed-width base32
+    characters. Within one generator IDs strictly increase even if the clock
+    steps backwards or more than 4 million IDs are made in one millisecond (the
+    generator then borrows the next millisecond), and generators with different
+    shards never collide. Because string order is time order, a range of IDs is
+    a range of creation times.
+    """
+
+    def __init__(self, shard=0):
+        if not 0 <= shard <= MAX_SHARD:
+            raise ValueError(f"Shard must be between 0 and {MAX_SHARD}")
+        self.shard = shard
+        self.last_ms = 0
+        self.sequence = 0
+
+    def next_id(self):
+        """Generate the next swap ID"""
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > self.last_ms:
+            self.last_ms = now_ms
+            self.sequence = 0
+        elif self.sequence < MAX_SEQUENCE:
+            self.sequence += 1
+        else:
+            self.last_ms += 1
+            self.sequence = 0
+        return encode_swap_id(self.last_ms, self.shard, self.sequence)
+
+    def advance_past(self, swap_id):
+        """Never generate an ID at or before `swap_id` (e.g. the newest one stored before a restart)"""
+        created_ms = swap_id_time_ms(swap_id) if swap_id else None
+        if created_ms is not None and created_ms >= self.last_ms:
+            self.last_ms = created_ms
+            self.sequence = MAX_SEQUENCE
+
+def encode_swap_id(created_ms, shard=0, sequence=0):
+    """Build the swap ID for a creation time, shard and sequence"""
+    value = (created_ms << (SHARD_BITS + SEQUENCE_BITS)) | (shard << SEQUENCE_BITS) | sequence
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return PREFIX + "".join(reversed(chars))
+
+def swap_id_time_ms(swap_id):
+    """Get the creation time in milliseconds encoded in a swap ID (None for other formats)"""
+    body = swap_id[len(PREFIX):] if swap_id.startswith(PREFIX) else None
+    if body is None or len(body) != ID_LENGTH:
+        return None
+    value = 0
+    for char in body:
+        digit = _DECODE.get(char)
+        if digit is None:
+            return None
+        value = (value << 5) | digit
+    return value >> (SHARD_BITS + SEQUENCE_BITS)
+
+def swap_id_bounds(start=None, end=None):
+    """Get (lower, upper) IDs so that lower <= id < upper selects swaps created in [start, end).
+
+    Times are Unix timestamps in seconds; a missing bound is returned as None.
+    """
+    lower = encode_swap_id(int(start * 1000)) if start is not None else None
+    upper = encode_swap_id(int(end * 1000)) if end is not None else None
+    return lower, upper
@@ -0,0 +1,84 @@
+class Token:
+    """A supported cryptocurrency"""
+
+    __slots__ = ("symbol", "name", "network", "decimals", "aliases")
+
+    def __init__(self, symbol, name, network, decimals=8, aliases=()):
+        self.symbol = symbol
+        self.name = name
+        self.network = network
+        self.decimals = decimals
+        self.aliases = tuple(aliases)
+
+class TrieNode:
+    """Prefix trie node holding the best completions for its prefix"""
+
+    __slots__ = ("children", "matches")
+
+    def __init__(self):
+        self.children = {}
+        self.matches = []
+
+class TokenRegistry:
+    """Supported tokens, built once from config.
+
+    Symbols, names and aliases are indexed case-insensitively in a dict, so
+    resolving user input is one hash lookup. Every key is also inserted into a
+    prefix trie whose nodes keep their first `max_completions` tokens in config
+    order, so autocomplete walks at most len(prefix) nodes and copies nothing.
+    """
+
+    def __init__(self, tokens, max_completions=25):
+        self.max_completions = max_completions
+        self.tokens = [
+            Token(token["symbol"].upper(), token["name"], token["network"],
+                  token.get("decimals", 8), token.get("aliases", ()))
+            for token in tokens
+        ]
+        self.by_symbol = {token.symbol: token for token in self.tokens}
+
+        # lowercased symbol, name or alias -> token
+        self.index = {}
+        for token in self.tokens:
+            for key in (token.symbol, token.name, *token.aliases):
+                self.index.setdefault(key.lower(), token)
+
+        self.trie = TrieNode()
+        for token in self.tokens:
+            for key in {key.lower() for key in (token.symbol, token.name, *token.aliases)}:
+                self._insert(key, token)
+
+    def __contains__(self, text):
+        return text.lower() in self.index
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def resolve(self, text):
+        """Get the token for a symbol, name or alias in any case (None if unknown)"""
+        return self.index.get(text.strip().lower())
+
+    def normalize(self, text):
+        """Get the symbol for a symbol, name or alias, or the uppercased input if unknown"""
+        token = self.resolve(text)
+        return token.symbol if token is not None else text.strip().upper()
+
+    def complete(self, prefix):
+        """Get the tokens whose symbol, name or alias starts with `prefix`, in config order"""
+        node = self.trie
+        for char in prefix.strip().lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.matches
+
+    def _insert(self, key, token):
+        node = self.trie
+        self._add_match(node, token)
+        for char in key:
+            node = node.children.setdefault(char, TrieNode())
+            self._add_match(node, token)
+
+    def _add_match(self, node, token):
+        if token not in node.matches and len(node.matches) < self.max_completions:
+            node.matches.append(token)
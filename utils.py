@@ -1,47 +1,183 @@
 import discord
 import random
 import time
-import asyncio
-import json
-import aiohttp
+import logging
+import numpy as np
+from collections.abc import Mapping
+from acl import AccessControl
 from config import config
+from dex import DexAggregator, DexProvider
+from embeds import FOOTER, EmbedTemplates
+from quotes import QuoteCache
+from pricefeed import PriceFeed, make_price_source
+from rates import RateMatrix
+from routing import DEFAULT_FEE_PERCENT, RouteTable
+from swapid import SwapIdGenerator
+from tokens import TokenRegistry
+
+log = logging.getLogger(__name__)
+
+# Mock base exchange rates for demo purposes
+MOCK_RATES = {
+    'BTC-ETH': 15.2,
+    'ETH-BTC': 0.065,
+    'BTC-LTC': 250,
+    'LTC-BTC': 0.004,
+    'ETH-LTC': 16.5,
+    'LTC-ETH': 0.06,
+    'BTC-XRP': 50000,
+    'XRP-BTC': 0.00002,
+    'ETH-XRP': 3300,
+    'XRP-ETH': 0.0003,
+    'BTC-SOL': 500,
+    'SOL-BTC': 0.002,
+    'ETH-SOL': 33,
+    'SOL-ETH': 0.03,
+    'BTC-DOGE': 100000,
+    'DOGE-BTC': 0.00001,
+    'BTC-BCH': 50,
+    'BCH-BTC': 0.02,
+    'BTC-XMR': 150,
+    'XMR-BTC': 0.0066,
+    'BTC-TRX': 200000,
+    'TRX-BTC': 0.000005
+}
+
+# Mock USD prices for demo purposes
+MOCK_USD_RATES = {
+    'BTC': 35000,
+    'ETH': 2300,
+    'LTC': 75,
+    'XRP': 0.7,
+    'SOL': 65,
+    'DOGE': 0.08,
+    'BCH': 250,
+    'XMR': 150,
+    'TRX': 0.1
+}
+
+# Display string for each swap field, in the order the details embed lists them
+SWAP_FORMATTERS = {
+    "id": lambda utils, swap: swap["id"],
+    "status": lambda utils, swap: swap["status"],
+    "fromAmount": lambda utils, swap: utils.format_currency(swap["fromAmount"], swap["fromCurrency"]),
+    "usdAmount": lambda utils, swap: utils.format_currency(swap.get("usdAmount", 0), "USD"),
+    "toAmount": lambda utils, swap: utils.format_currency(swap["toAmount"], swap["toCurrency"]),
+    "exchangeFee": lambda utils, swap: utils.format_currency(swap.get("exchangeFee", 0), swap["toCurrency"]),
+    "platformFee": lambda utils, swap: utils.format_currency(swap.get("platformFee", 0), swap["toCurrency"]),
+    "totalFee": lambda utils, swap: utils.format_currency(
+        swap.get("exchangeFee", 0) + swap.get("platformFee", 0), swap["toCurrency"]),
+    "exchangeFeePercent": lambda utils, swap: f"{swap.get('exchangeFeePercent', 0)}%",
+    "platformFeePercent": lambda utils, swap: f"{swap.get('platformFeePercent', 0)}%",
+    "totalFeePercent": lambda utils, swap: f"{swap.get('exchangeFeePercent', 0) + swap.get('platformFeePercent', 0)}%",
+    "fee": lambda utils, swap: f"{swap.get('fee', 0)}%",
+    "initiatedAt": lambda utils, swap: swap.get("timestamp") or "N/A",
+    "userId": lambda utils, swap: swap["userId"],
+    "sourceAddress": lambda utils, swap: swap.get("sourceAddress", "N/A"),
+    "destinationAddress": lambda utils, swap: swap.get("destinationAddress", "N/A"),
+    "confirmations": lambda utils, swap: swap.get("confirmations", 0),
+    "requiredConfirmations": lambda utils, swap: swap.get("requiredConfirmations", 0),
+    "exchangeRate": lambda utils, swap: swap["exchangeRate"],
+    "dexName": lambda utils, swap: swap.get("dexName", "N/A"),
+    "dexTxId": lambda utils, swap: swap.get("dexTxId", "N/A")
+}
+
+class FormattedSwap(Mapping):
+    """Read-only mapping of a swap's display strings, formatted on access"""
+
+    def __init__(self, utils, swap):
+        self._utils = utils
+        self._swap = swap
+
+    def __getitem__(self, key):
+        return SWAP_FORMATTERS[key](self._utils, self._swap)
+
+    def __iter__(self):
+        return iter(SWAP_FORMATTERS)
+
+    def __len__(self):
+        return len(SWAP_FORMATTERS)
 
 class Utils:
     """Utility functions for the bot"""
     
     def __init__(self):
-        # Mock USD rates for demo purposes
-        self.usd_rates = {
-            'BTC': 35000,
-            'ETH': 2300,
-            'LTC': 75,
-            'XRP': 0.7,
-            'SOL': 65,
-            'DOGE': 0.08,
-            'BCH': 250,
-            'XMR': 150,
-            'TRX': 0.1
-        }
+        # Streaming USD prices; the mock source starts from the demo prices
+        self.price_feed = PriceFeed(
+            tokens=[token["symbol"] for token in config["supportedTokens"]],
+            source=make_price_source(config["priceFeedSource"], MOCK_USD_RATES, config["priceFeedMockInterval"]),
+            max_age=config["priceFeedMaxAge"],
+            publish_interval=config["priceFeedPublishInterval"]
+        )
+        if config["priceFeedSource"] == "mock":
+            self.price_feed.update(MOCK_USD_RATES)
+        
+        # Owner, admin, whitelist and blacklist membership
+        self.acl = AccessControl()
+        
+        # Supported tokens indexed by symbol, name and alias
+        self.tokens = TokenRegistry(config["supportedTokens"])
+        
+        # Time-ordered swap IDs, unique per shard
+        self.swap_ids = SwapIdGenerator(config["swapIdShard"])
+        
+        # Shared HTTP session, attached by the bot on startup
+        self.session = None
+        
+        # Static embeds built once and reused across interactions
+        self.embed_templates = EmbedTemplates()
+        
+        # Cache of exchange quotes per currency pair
+        self.quote_cache = QuoteCache(
+            ttl=config["quoteCacheTTL"],
+            stale_ttl=config["quoteCacheStaleTTL"],
+            max_size=config["quoteCacheSize"],
+            pair_ttls=config["quoteCachePairTTL"]
+        )
+        
+        # Dense rate/fee matrices indexed by the order of supported tokens
+        self.rate_matrix = RateMatrix([token["symbol"] for token in config["supportedTokens"]])
+        self.rate_matrix.set_rates(
+            {tuple(pair.split("-")): (rate, DEFAULT_FEE_PERCENT) for pair, rate in MOCK_RATES.items()}
+        )
+        
+        # Best multi-hop routes for pairs without a direct market, built from the base rates
+        self.route_table = RouteTable(self.rate_matrix)
+        
+        # Aggregator over every configured DEX
+        self.dex_aggregator = DexAggregator(
+            providers=[
+                DexProvider(dex["name"], dex["url"], self.fetch_exchange_rate)
+                for dex in config["dexAPIs"]
+            ],
+            timeout=config["dexQuoteTimeout"],
+            hedge_delay=config["dexQuoteHedgeDelay"],
+            max_attempts=config["dexQuoteMaxAttempts"],
+            quorum=config["dexQuoteQuorum"],
+            deadline=config["dexQuoteDeadline"]
+        )
+        
+    def attach_session(self, session):
+        """Use the bot's shared HTTP session for outbound requests"""
+        self.session = session
+        for provider in self.dex_aggregator.providers:
+            provider.session = session
         
     def is_owner(self, user_id):
         """Check if a user is the bot owner"""
-        owner_id = config["ownerId"]
-        # Convert both user IDs to strings for comparison
-        user_id_str = str(user_id)
-        owner_id_str = str(owner_id) if owner_id is not None else None
-        
-        print(f"Comparing user ID: {user_id_str} with owner ID: {owner_id_str}")
-        return user_id_str == owner_id_str
+        return self.acl.has_role(user_id, "owner")
+    
+    def is_admin(self, user_id):
+        """Check if a user may run administrative commands (owner or admin)"""
+        return self.acl.has_role(user_id, "owner") or self.acl.has_role(user_id, "admin")
     
     def is_blacklisted(self, user_id):
         """Check if a user is blacklisted"""
-        user_id_str = str(user_id)
-        return user_id_str in [str(id) for id in config["blacklistedUsers"]]
+        return self.acl.has_role(user_id, "blacklist")
     
     def is_whitelisted(self, user_id):
         """Check if a user is whitelisted"""
-        user_id_str = str(user_id)
-        return user_id_str in [str(id) for id in config["whitelistedUsers"]]
+        return self.acl.has_role(user_id, "whitelist")
     
     def is_in_maintenance(self):
         """Check if the bot is in maintenance mode"""
@@ -52,8 +188,8 @@ class Utils:
         if self.is_blacklisted(user_id):
             return False
         
-        # Maintenance mode check - owners can always use the bot
-        if self.is_owner(user_id):
+        # Maintenance mode check - owners and admins can always use the bot
+        if self.is_admin(user_id):
             return True
             
         # In maintenance mode, only whitelisted users can use the bot
@@ -66,116 +202,83 @@ class Utils:
         """Format a currency amount for display"""
         if currency == "USD":
             return f"${amount:.2f}"
-        return f"{amount:.8f}".rstrip('0').rstrip('.') + f" {currency}"
+        token = self.tokens.by_symbol.get(currency)
+        places = min(token.decimals, 8) if token is not None else 8
+        return f"{amount:.{places}f}".rstrip('0').rstrip('.') + f" {currency}"
     
     def generate_swap_id(self):
         """Generate a unique swap ID"""
-        return f"KONG-{int(time.time())}-{random.randint(0, 999)}"
+        return self.swap_ids.next_id()
     
     def get_timestamp(self):
         """Get current timestamp"""
         return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
     
     def format_swap_record(self, swap):
-        """Format a swap record for display"""
-        # Calculate total fees
-        exchange_fee = swap.get('exchangeFee', 0)
-        platform_fee = swap.get('platformFee', 0)
-        total_fee = exchange_fee + platform_fee
-        
-        return {
-            "id": swap["id"],
-            "status": swap["status"],
-            "fromAmount": self.format_currency(swap["fromAmount"], swap["fromCurrency"]),
-            "usdAmount": self.format_currency(swap.get("usdAmount", 0), "USD"),
-            "toAmount": self.format_currency(swap["toAmount"], swap["toCurrency"]),
-            "exchangeFee": self.format_currency(swap.get("exchangeFee", 0), swap["toCurrency"]),
-            "platformFee": self.format_currency(swap.get("platformFee", 0), swap["toCurrency"]),
-            "totalFee": self.format_currency(total_fee, swap["toCurrency"]),
-            "exchangeFeePercent": f"{swap.get('exchangeFeePercent', 0)}%",
-            "platformFeePercent": f"{swap.get('platformFeePercent', 0)}%",
-            "totalFeePercent": f"{swap.get('exchangeFeePercent', 0) + swap.get('platformFeePercent', 0)}%",
-            "fee": f"{swap.get('fee', 0)}%",
-            "initiatedAt": swap["timestamp"],
-            "userId": swap["userId"],
-            "sourceAddress": swap.get("sourceAddress", "N/A"),
-            "destinationAddress": swap.get("destinationAddress", "N/A"),
-            "confirmations": swap.get("confirmations", 0),
-            "requiredConfirmations": swap.get("requiredConfirmations", 0),
-            "exchangeRate": swap["exchangeRate"],
-            "dexName": swap.get("dexName", "N/A"),
-            "dexTxId": swap.get("dexTxId", "N/A")
-        }
+        """Get a read-only view of a swap's display strings, each formatted only when read"""
+        return FormattedSwap(self, swap)
     
     async def send_direct_message(self, bot, user_id, message):
-        """Send a direct message to a user"""
+        """Queue a direct message to a user on the bot's outbox"""
         try:
-            user = await bot.fetch_user(int(user_id))
-            await user.send(message)
+            bot.notifier.notify(user_id, content=message)
             return True
         except Exception as e:
-            print(f"Failed to send DM to user {user_id}: {str(e)}")
+            log.error("Failed to queue DM to user %s: %s", user_id, e)
             return False
     
     def is_token_supported(self, token_symbol):
         """Check if token is supported"""
-        return any(
-            token["symbol"].lower() == token_symbol.lower()
-            for token in config["supportedTokens"]
-        )
+        return token_symbol in self.tokens
     
-    def get_usd_rate(self, currency):
-        """Get USD rate for a currency"""
-        return self.usd_rates.get(currency.upper(), 1.0)
+    def get_usd_rate(self, currency, snapshot=None):
+        """Get USD rate for a currency from a price snapshot (the latest by default; 0 if unknown)"""
+        snapshot = self.price_feed.snapshot if snapshot is None else snapshot
+        return snapshot.prices.get(currency.upper(), 0.0)
     
-    def usd_to_crypto(self, usd_amount, currency):
+    def usd_to_crypto(self, usd_amount, currency, snapshot=None):
         """Convert USD to cryptocurrency amount"""
-        rate = self.get_usd_rate(currency)
+        rate = self.get_usd_rate(currency, snapshot)
         if rate <= 0:
             return 0
         return usd_amount / rate
     
-    def crypto_to_usd(self, crypto_amount, currency):
+    def crypto_to_usd(self, crypto_amount, currency, snapshot=None):
         """Convert cryptocurrency to USD amount"""
-        rate = self.get_usd_rate(currency)
+        rate = self.get_usd_rate(currency, snapshot)
         return crypto_amount * rate
     
-    async def get_exchange_rate(self, from_currency, to_currency):
-        """Get exchange rate between two currencies (mock implementation)"""
+    async def get_exchange_rate(self, from_currency, to_currency, amount=None):
+        """Get the best exchange rate between two currencies, served from the quote cache when fresh"""
+        if not self.route_table.has_direct(from_currency, to_currency):
+            # No direct market: answer from the precomputed multi-hop routes
+            quote = self.route_table.get_route(from_currency, to_currency)
+            return {**quote, "platformFeePercent": config["defaultFee"]}
+        
+        pair = f"{from_currency}-{to_currency}"
+        quote = await self.quote_cache.get(
+            pair,
+            lambda: self.fetch_best_quote(from_currency, to_currency, amount)
+        )
+        
+        # The platform fee is not cached so fee changes apply immediately
+        return {**quote, "platformFeePercent": config["defaultFee"]}
+    
+    async def fetch_best_quote(self, from_currency, to_currency, amount=None):
+        """Fetch the best quote across all DEXs"""
+        return await self.dex_aggregator.get_best_quote(from_currency, to_currency, amount)
+    
+    async def fetch_exchange_rate(self, from_currency, to_currency):
+        """Fetch exchange rate between two currencies from a single source (mock implementation)"""
         # In a real implementation, this would fetch rates from DEX APIs
         # For this demo, we'll use a mock implementation
-        mock_rates = {
-            'BTC-ETH': 15.2,
-            'ETH-BTC': 0.065,
-            'BTC-LTC': 250,
-            'LTC-BTC': 0.004,
-            'ETH-LTC': 16.5,
-            'LTC-ETH': 0.06,
-            'BTC-XRP': 50000,
-            'XRP-BTC': 0.00002,
-            'ETH-XRP': 3300,
-            'XRP-ETH': 0.0003,
-            'BTC-SOL': 500,
-            'SOL-BTC': 0.002,
-            'ETH-SOL': 33,
-            'SOL-ETH': 0.03,
-            'BTC-DOGE': 100000,
-            'DOGE-BTC': 0.00001,
-            'BTC-BCH': 50,
-            'BCH-BTC': 0.02,
-            'BTC-XMR': 150,
-            'XMR-BTC': 0.0066,
-            'BTC-TRX': 200000,
-            'TRX-BTC': 0.000005
-        }
-
         pair = f"{from_currency}-{to_currency}"
         
         # Add a small random variation to simulate market movements
         variation = 1 + (random.random() - 0.5) * 0.02  # +/- 1%
         
-        if pair in mock_rates:
-            base_rate = mock_rates[pair]
+        if pair in MOCK_RATES:
+            base_rate = MOCK_RATES[pair]
             current_rate = base_rate * variation
             
             # Mock exchange fee (0.1% to 0.3%)
@@ -184,22 +287,119 @@ class Utils:
             return {
                 "rate": current_rate,
                 "source": "MockAPI",
-                "exchangeFeePercent": exchange_fee_percent,
-                "platformFeePercent": config["defaultFee"]
+                "exchangeFeePercent": exchange_fee_percent
             }
         
         raise ValueError(f"Exchange rate not available for {pair}")
     
     async def find_best_exchange_rate(self, from_currency, to_currency, amount):
         """Find the best exchange rate from multiple DEXs"""
-        # In a real implementation, this would query multiple DEX APIs
-        # For this demo, we just use our mock implementation
-        return await self.get_exchange_rate(from_currency, to_currency)
+        return await self.get_exchange_rate(from_currency, to_currency, amount)
     
     def calculate_fee(self, amount, fee_percentage):
         """Calculate the service fee"""
         return amount * (fee_percentage / 100)
     
+    def parse_quote_legs(self, text):
+        """Parse quote legs like "100 BTC ETH, 50 ETH SOL" into (usd_amount, from, to) tuples"""
+        legs = []
+        for part in text.replace(";", ",").split(","):
+            if not part.strip():
+                continue
+            
+            words = part.replace("$", " ").split()
+            if len(words) != 3:
+                raise ValueError(f"Could not understand quote leg: {part.strip()}")
+            
+            try:
+                usd_amount = float(words[0])
+            except ValueError:
+                raise ValueError(f"Invalid USD amount: {words[0]}")
+            
+            legs.append((usd_amount, self.tokens.normalize(words[1]), self.tokens.normalize(words[2])))
+        return legs
+    
+    def quote_many(self, legs):
+        """Quote many (usd_amount, from, to) legs at once without creating swaps.
+        
+        Every leg is priced against the same snapshot of USD prices and rates in
+        one vectorized pass. Pairs with a direct market are priced like /swap
+        prices them: at the cached live DEX quote, or the base rate when none is
+        cached. Other pairs use the best multi-hop route. Returns one dict per
+        leg; legs that cannot be quoted (unknown tokens, bad amounts, stale
+        prices, no rate) carry an "error" key instead of amounts.
+        """
+        # np.where builds new matrices, so the quotes below read one consistent
+        # copy even though RateMatrix.set_rates writes in place
+        self.route_table.refresh()
+        direct = ~np.isnan(self.rate_matrix.rates)
+        rates = np.where(direct, self.rate_matrix.rates, self.route_table.route_rates)
+        fees = np.where(direct, self.rate_matrix.fees, self.route_table.route_fees)
+        prices = self.price_feed.snapshot
+        usd_prices = prices.usd
+        platform_fee_percent = config["defaultFee"]
+        minimum = config["minimumSwapAmountUSD"]
+        
+        # Unknown tokens are quoted as the first token and replaced by an error below
+        index = self.rate_matrix.index
+        first_token = self.rate_matrix.tokens[0]
+        usd_amounts = np.asarray([leg[0] for leg in legs], dtype=float)
+        from_symbols = [leg[1] if leg[1] in index else first_token for leg in legs]
+        to_symbols = [leg[2] if leg[2] in index else first_token for leg in legs]
+        
+        # Never fetches: a direct pair without a usable cached quote keeps its base rate
+        for from_currency, to_currency in zip(from_symbols, to_symbols):
+            i, j = index[from_currency], index[to_currency]
+            quote = self.quote_cache.peek(f"{from_currency}-{to_currency}") if direct[i, j] else None
+            if quote is not None:
+                rates[i, j] = quote["rate"]
+                fees[i, j] = quote["exchangeFeePercent"]
+        
+        from_prices = usd_prices[self.rate_matrix.indices(from_symbols)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            from_amounts = np.where(from_prices > 0, usd_amounts / from_prices, 0.0)
+        
+        quotes = self.rate_matrix.quote_many(
+            from_amounts, from_symbols, to_symbols, platform_fee_percent,
+            rates=rates, fees=fees, calculate_fee=self.calculate_fee
+        )
+        
+        results = []
+        for k, (usd_amount, from_currency, to_currency) in enumerate(legs):
+            result = {"usdAmount": usd_amount, "fromCurrency": from_currency, "toCurrency": to_currency}
+            
+            stale = prices.stale_symbols((from_currency, to_currency), self.price_feed.max_age)
+            if from_currency not in index:
+                result["error"] = f"Invalid source currency: {from_currency}."
+            elif to_currency not in index:
+                result["error"] = f"Invalid target currency: {to_currency}."
+            elif from_currency == to_currency:
+                result["error"] = "Source and target currencies cannot be the same."
+            elif not usd_amount > 0:
+                result["error"] = "Amount must be greater than zero."
+            elif usd_amount < minimum:
+                result["error"] = f"Amount is below the minimum required (${minimum} USD)."
+            elif stale:
+                result["error"] = f"USD price out of date for {', '.join(stale)}."
+            elif not from_amounts[k] > 0:
+                result["error"] = f"Could not convert ${usd_amount} to {from_currency}."
+            elif np.isnan(quotes["rate"][k]):
+                result["error"] = f"Exchange rate not available for {from_currency}-{to_currency}"
+            else:
+                result.update({
+                    "fromAmount": float(from_amounts[k]),
+                    "toAmount": float(quotes["finalAmount"][k]),
+                    "rate": float(quotes["rate"][k]),
+                    "exchangeFeePercent": float(quotes["exchangeFeePercent"][k]),
+                    "exchangeFee": float(quotes["exchangeFee"][k]),
+                    "platformFeePercent": platform_fee_percent,
+                    "platformFee": float(quotes["platformFee"][k]),
+                    "totalFee": float(quotes["totalFee"][k]),
+                    "priceVersion": prices.version
+                })
+            results.append(result)
+        return results
+    
     async def meets_minimum_amount(self, usd_amount):
         """Check if USD amount meets the minimum swap requirement"""
         return usd_amount >= config["minimumSwapAmountUSD"]
@@ -225,7 +425,6 @@ class Utils:
         embed.timestamp = discord.utils.utcnow()
         
         # Add a fancy footer with the bot name
-        embed.set_footer(text="🦍 CoinKong Bot | Crypto Swaps Made Simple", 
-                         icon_url="https://cdn.discordapp.com/attachments/1179286008138305617/1191166853750788096/bot_profile_pic.png?ex=65a84c40&is=6595d740&hm=76ce5d4e6cb775a9db3d5e0935b87e97d7a8fc873ac3d37dc5c7c9a001a12f36&")
+        embed.set_footer(text=FOOTER["text"], icon_url=FOOTER["icon_url"])
         
         return embed